@@ -0,0 +1,112 @@
+# How gen scales with the size of the history: generates synthetic datasets at multiples of real F1 history
+# (benchmarks/synthetic.py, one independent championship per multiple) and times ingestion, compute_ratings,
+# saving and loading the snapshot and plotting, each scale in its own process so peak memory is its own.
+# usage: python benchmarks/scaling.py [--scales=1,10,100] [--timeout=seconds] [--report=path]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate
+
+SCALES = [1, 10, 100]
+TIMEOUT_SECONDS = 3600
+STAGES = ["fetch", "ingest", "compute", "save", "load", "plot"]
+
+def peak_memory():
+    # peak resident memory of this process in bytes, None where resource is not available
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def run_scale(directory):
+    # runs in the child process, in directory: every stage on the dataset written there
+    from f1ratings.api import F1Ratings
+    from f1ratings.profiling import profile_run, set_verbosity, stage
+    set_verbosity(0)
+    with profile_run("scaling", report_path=None) as result:
+        ratings = F1Ratings()
+        ratings.fetch(directory, cache_dir=os.path.join(directory, "cache")) # cold, parsed and cached
+        ratings.compute()
+        ratings.save()
+        F1Ratings().load()
+        with stage("plot"):
+            plots = ratings.plots()
+            figure = plots.plot_drivers_rating(ratings.drivers, date(1950, 1, 1), date.today(), plots.new_figure())
+            figure.savefig("ratings/all_drivers.png")
+            ratings.save_plot_today_grid()
+    stages = result["stages"]
+    return {"races": sum(len(season.races) for season in ratings.seasons), "drivers": len(ratings.drivers),
+            "teams": len(ratings.teams), "wall_seconds": result["wall_seconds"],
+            "seconds": {name: stages[name]["seconds"] for name in STAGES if name in stages},
+            "peak_memory_bytes": peak_memory()}
+
+def measure(scale, timeout):
+    # generates the dataset and measures it in a child process, None if it ran out of time
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        # datasets end with last season: season_weights weights the current season as if it had
+        # params.current_season_length races, which with several championships a year makes its weight several
+        # times too large, and decay then overshoots until team ratings overflow
+        generate(directory, series=scale, seasons=date.today().year - 1950, first_year=1950)
+        generated = time.perf_counter() - start
+        try:
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", directory],
+                                   cwd=directory, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+        if child.returncode != 0:
+            raise RuntimeError(f"Scale {scale} failed:\n{child.stderr}")
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        result.update(scale=scale, generate_seconds=generated)
+        return result
+
+def print_row(result):
+    seconds = result["seconds"]
+    memory = result["peak_memory_bytes"]
+    print(f"{result['scale']:>5}x {result['races']:>7} {result['drivers']:>7} "
+          f"{seconds['fetch'] + seconds['ingest']:>9.2f} {seconds['compute']:>9.2f} "
+          f"{result['races'] / seconds['compute']:>8.0f} {seconds['save']:>7.2f} {seconds['load']:>7.2f} "
+          f"{seconds['plot']:>7.2f} {memory / 2**20 if memory is not None else float('nan'):>9.0f}")
+
+def get_option(name, default):
+    for arg in sys.argv[1:]:
+        if arg.startswith(f"--{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        print(json.dumps(run_scale(sys.argv[2])))
+        return
+    scales = [int(scale) for scale in get_option("scales", ",".join(map(str, SCALES))).split(",")]
+    timeout = float(get_option("timeout", TIMEOUT_SECONDS))
+    report_path = get_option("report", None)
+
+    print("Times in seconds")
+    print(f"{'scale':>6} {'races':>7} {'drivers':>7} {'ingest':>9} {'compute':>9} {'races/s':>8} "
+          f"{'save':>7} {'load':>7} {'plot':>7} {'peak MiB':>9}")
+    results = []
+    for scale in scales:
+        result = measure(scale, timeout)
+        if result is None:
+            print(f"{scale:>5}x did not finish within {timeout:.0f}s")
+            continue
+        print_row(result)
+        results.append(result)
+    if report_path is not None:
+        with open(report_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
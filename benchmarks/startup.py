@@ -0,0 +1,72 @@
+# Startup time of read-only CLI commands: times `python main.py change <name>` against a saved snapshot
+# and checks that the plotting and data stacks are not imported.
+# usage: python benchmarks/startup.py [runs] [target seconds]
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from f1ratings.dataclasses import Driver, Team
+from f1ratings.history import RatingHistory
+from f1ratings.snapshot import save_snapshot
+
+TARGET_SECONDS = 0.3
+HEAVY_MODULES = ["matplotlib", "pandas", "kagglehub", "numpy"]
+NUM_DRIVERS = 900
+NUM_TEAMS = 200
+NUM_RATINGS = 400
+
+def write_snapshot(directory):
+    # a snapshot the size of the real one, with made-up names and ratings
+    start = date(1950, 5, 13)
+    def history(seed):
+        return RatingHistory([(1200 + (seed * 7 + i * 13) % 400, start + timedelta(days=14 * i)) for i in range(NUM_RATINGS)])
+    drivers = [Driver(id=i, forename=f"Forename{i}", surname=f"Surname{i}", ratings=history(i)) for i in range(NUM_DRIVERS)]
+    teams = [Team(id=i, name=f"Team{i}", ratings=history(i)) for i in range(NUM_TEAMS)]
+    os.makedirs(os.path.join(directory, "ratings"), exist_ok=True)
+    save_snapshot(os.path.join(directory, "ratings", "f1ratings.f1"), drivers, teams, grid=([0, 1], [0]))
+
+def time_command(args, directory):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), *args], cwd=directory, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def time_command_bare():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+def imported_modules(args, directory):
+    result = subprocess.run([sys.executable, "-X", "importtime", os.path.join(ROOT, "main.py"), *args],
+                            cwd=directory, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return {line.split("|")[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else TARGET_SECONDS
+    with tempfile.TemporaryDirectory() as directory:
+        write_snapshot(directory)
+        args = ["change", f"Forename{NUM_DRIVERS // 2} Surname{NUM_DRIVERS // 2}"]
+        time_command(args, directory) # warm the page cache and bytecode
+        times = [time_command(args, directory) for _ in range(runs)]
+        interpreter = statistics.median(time_command_bare() for _ in range(min(runs, 5)))
+        heavy = sorted(module for module in imported_modules(args, directory) if module.split(".")[0] in HEAVY_MODULES)
+
+    median = statistics.median(times)
+    print(f"main.py {' '.join(args)}: median {median * 1000:.0f}ms, min {min(times) * 1000:.0f}ms over {runs} runs "
+          f"(bare interpreter {interpreter * 1000:.0f}ms, target {target * 1000:.0f}ms)")
+    if heavy:
+        print(f"Imported heavy modules: {', '.join(sorted({module.split('.')[0] for module in heavy}))}")
+    if median > target or heavy:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
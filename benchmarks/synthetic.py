@@ -0,0 +1,248 @@
+# Seeded synthetic dataset in the layout of the Kaggle dataset: the ten CSV tables of config.FILES, readable
+# with `main.py gen --data=<dir>`. The defaults are about the size of real F1 history (77 seasons of ~15 races
+# with ~22 cars); series > 1 runs that many independent championships over the same years, which scales the
+# number of races, drivers and teams together without leaving the dates pandas and fetch.py accept.
+# Seasons end with the current one unless first_year is given, so any number of them has qualifying and sprints.
+# Results follow hidden driver and team skills plus noise, so ratings spread out the way real ones do.
+# usage: python benchmarks/synthetic.py <dir> [--series=N] [--seed=N] [--seasons=N] [--first-year=N] [--races=N] [--field=N] [--sprint-rate=R] [--dnf-rate=R]
+import csv
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+STATUSES = {1: "Finished", 3: "Accident", 4: "Collision", 5: "Engine", 6: "Gearbox", 11: "+1 Lap", 12: "+2 Laps",
+            20: "Spun off", 22: "Suspension", 77: "107% Rule", 81: "Did not qualify", 97: "Did not prequalify",
+            130: "Collision damage"}
+FINISHED_STATUSES = [1, 1, 1, 11, 12]
+RETIRED_STATUSES = [3, 4, 5, 6, 20, 22, 130]
+NOT_STARTED_STATUSES = [77, 81, 97]
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+SPRINT_POINTS = [8, 7, 6, 5, 4, 3, 2, 1]
+NULL = "\\N"
+
+RESULT_HEADER = ["resultId", "raceId", "driverId", "constructorId", "number", "grid", "position", "positionText",
+                 "positionOrder", "points", "laps", "time", "milliseconds", "fastestLap", "rank", "fastestLapTime",
+                 "fastestLapSpeed", "statusId"]
+SPRINT_HEADER = [column for column in RESULT_HEADER if column != "fastestLapSpeed"]
+
+def race_time(seconds):
+    return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+
+class Table:
+    def __init__(self, directory, name, header):
+        self.file = open(os.path.join(directory, f"{name}.csv"), 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+        self.rows = 0
+
+    def add(self, row):
+        self.rows += 1
+        self.writer.writerow((self.rows, *row))
+
+    def close(self):
+        self.file.close()
+
+class Series:
+    # one championship: its teams, their two drivers each, and the hidden skills results are drawn from
+    def __init__(self, rng, field_size, new_driver, new_team):
+        self.rng = rng
+        self.new_driver = new_driver
+        self.new_team = new_team
+        self.skills = {}
+        self.retired_teams = []
+        self.teams = {}
+        for _ in range(max(field_size // 2, 1)):
+            self.add_team()
+
+    def skill(self, key):
+        if key not in self.skills:
+            self.skills[key] = self.rng.gauss(0, 1)
+        return self.skills[key]
+
+    def add_team(self):
+        if self.retired_teams and self.rng.random() < 0.3: # a team coming back after some seasons away
+            team = self.retired_teams.pop(self.rng.randrange(len(self.retired_teams)))
+        else:
+            team = self.new_team()
+        self.teams[team] = [self.new_driver(), self.new_driver()]
+
+    def new_season(self, team_change_rate, driver_change_rate):
+        for team in list(self.teams):
+            if self.rng.random() < team_change_rate:
+                del self.teams[team]
+                self.retired_teams.append(team)
+                self.add_team()
+        for team, drivers in self.teams.items():
+            if self.rng.random() < driver_change_rate:
+                drivers[self.rng.randrange(len(drivers))] = self.new_driver()
+            for key in (("team", team), *(("driver", driver) for driver in drivers)):
+                self.skills[key] = self.skill(key) * 0.8 + self.rng.gauss(0, 0.6) # form changes between seasons
+
+    def entrants(self):
+        entrants = [(driver, team) for team, drivers in self.teams.items() for driver in drivers]
+        if len(entrants) > 2 and self.rng.random() < 0.2: # a car missing the race
+            entrants.pop(self.rng.randrange(len(entrants)))
+        return entrants
+
+    def order(self, entrants, noise):
+        # entrants best first, by driver and team skill plus noise
+        return sorted(entrants, key=lambda entrant: -(self.skill(("driver", entrant[0])) + self.skill(("team", entrant[1]))
+                                                      + self.rng.gauss(0, noise)))
+
+def generate(directory, seed=0, series=1, seasons=77, first_year=None, races_per_season=15, field_size=22,
+             quali_from=1994, sprint_from=2021, sprint_rate=0.25, dnf_rate=0.2, team_change_rate=0.15,
+             driver_change_rate=0.8, today=None):
+    # writes the tables to directory, returns the number of races with results
+    # the change rates are per team and season: a team leaving, one of its drivers being replaced
+    rng = random.Random(seed)
+    today = today or date.today()
+    if first_year is None:
+        first_year = today.year - seasons + 1
+    os.makedirs(directory, exist_ok=True)
+    tables = {
+        "races": Table(directory, "races", ["raceId", "year", "round", "circuitId", "name", "date", "time", "url"]),
+        "results": Table(directory, "results", RESULT_HEADER),
+        "qualifying": Table(directory, "qualifying", ["qualifyId", "raceId", "driverId", "constructorId", "number",
+                                                      "position", "q1", "q2", "q3"]),
+        "sprint_results": Table(directory, "sprint_results", SPRINT_HEADER),
+        "driver_standings": Table(directory, "driver_standings", ["driverStandingsId", "raceId", "driverId", "points",
+                                                                  "position", "positionText", "wins"]),
+        "constructor_standings": Table(directory, "constructor_standings", ["constructorStandingsId", "raceId",
+                                                                            "constructorId", "points", "position",
+                                                                            "positionText", "wins"]),
+        "constructor_results": Table(directory, "constructor_results", ["constructorResultsId", "raceId",
+                                                                        "constructorId", "points", "status"])
+    }
+    driver_count, team_count = 0, 0
+    def new_driver():
+        nonlocal driver_count
+        driver_count += 1
+        return driver_count
+    def new_team():
+        nonlocal team_count
+        team_count += 1
+        return team_count
+
+    championships = [Series(rng, field_size, new_driver, new_team) for _ in range(series)]
+    raced = 0
+    for year in range(first_year, first_year + seasons):
+        for number, championship in enumerate(championships):
+            if year > first_year:
+                championship.new_season(team_change_rate, driver_change_rate)
+            num_races = max(races_per_season + rng.randint(-2, 2), 1)
+            driver_points, team_points, driver_wins, team_wins = {}, {}, {}, {}
+            for round_number in range(1, num_races + 1):
+                race_date = date(year, 3, 1) + timedelta(days=round_number * 270 // num_races + number % 7)
+                tables["races"].add((year, round_number, rng.randint(1, 80), f"Series {number + 1} Grand Prix {round_number}",
+                                     race_date.isoformat(), NULL, NULL))
+                race_id = tables["races"].rows
+                if race_date > today: # the calendar is known ahead, results are not
+                    continue
+                raced += 1
+                add_race(tables, rng, championship, race_id, year >= quali_from,
+                         year >= sprint_from and rng.random() < sprint_rate, dnf_rate,
+                         driver_points, team_points, driver_wins, team_wins)
+    for table in tables.values():
+        table.close()
+    # F1Ratings.fetch rejects datasets without any of these
+    for name, rows, cause in (("races", raced, "no season before today"),
+                              ("qualifying sessions", tables["qualifying"].rows, f"no race from {quali_from} on"),
+                              ("sprints", tables["sprint_results"].rows, f"no sprint drawn from {sprint_from} on")):
+        if not rows:
+            raise ValueError(f"No {name} generated ({cause}), seasons {first_year}-{first_year + seasons - 1}.")
+
+    with open(os.path.join(directory, "drivers.csv"), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["driverId", "driverRef", "number", "code", "forename", "surname", "dob", "nationality", "url"])
+        writer.writerows((i, f"driver{i}", NULL, NULL, f"Forename{i}", f"Surname{i}", "1930-01-01", "Synthetic", NULL)
+                         for i in range(1, driver_count + 1))
+    with open(os.path.join(directory, "constructors.csv"), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["constructorId", "constructorRef", "name", "nationality", "url"])
+        writer.writerows((i, f"team{i}", f"Team {i}", "Synthetic", NULL) for i in range(1, team_count + 1))
+    with open(os.path.join(directory, "status.csv"), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["statusId", "status"])
+        writer.writerows(STATUSES.items())
+    return raced
+
+def add_race(tables, rng, championship, race_id, has_quali, has_sprint, dnf_rate,
+             driver_points, team_points, driver_wins, team_wins):
+    entrants = championship.entrants()
+    grid = championship.order(entrants, noise=1.0)
+    grid_positions = {driver: i + 1 for i, (driver, _) in enumerate(grid)}
+    if has_quali:
+        for position, (driver, team) in enumerate(grid, 1):
+            tables["qualifying"].add((race_id, driver, team, driver % 99 + 1, position, "1:20.000", NULL, NULL))
+
+    if has_sprint:
+        finish = championship.order(entrants, noise=1.2)
+        for position, (driver, team) in enumerate(finish, 1):
+            retired = rng.random() < dnf_rate / 2
+            points = SPRINT_POINTS[position - 1] if not retired and position <= len(SPRINT_POINTS) else 0
+            time = NULL if retired else (race_time(1800 + rng.random() * 120) if position == 1 else f"+{rng.random() * 20:.3f}")
+            tables["sprint_results"].add((race_id, driver, team, driver % 99 + 1, grid_positions[driver],
+                                          NULL if retired else position, "R" if retired else position, position, points,
+                                          20, time, NULL, NULL, NULL, NULL,
+                                          rng.choice(RETIRED_STATUSES) if retired else 1))
+
+    finish = championship.order(entrants, noise=1.2)
+    starters = [entrant for entrant in finish if rng.random() > dnf_rate * 0.1]
+    not_started = [entrant for entrant in finish if entrant not in starters]
+    finishers = [entrant for entrant in starters if rng.random() > dnf_rate]
+    retired = [entrant for entrant in starters if entrant not in finishers]
+    race_points = {}
+    for position, (driver, team) in enumerate(finishers + retired + not_started, 1):
+        finished = position <= len(finishers)
+        points = POINTS[position - 1] if finished and position <= len(POINTS) else 0
+        race_points[driver] = points
+        team_points[team] = team_points.get(team, 0) + points
+        driver_points[driver] = driver_points.get(driver, 0) + points
+        if finished:
+            status = rng.choice(FINISHED_STATUSES)
+            time = race_time(5400 + rng.random() * 900) if position == 1 else f"+{rng.random() * 90:.3f}"
+        elif position <= len(finishers) + len(retired):
+            status, time = rng.choice(RETIRED_STATUSES), NULL
+        else:
+            status, time = rng.choice(NOT_STARTED_STATUSES), NULL
+        tables["results"].add((race_id, driver, team, driver % 99 + 1, grid_positions[driver],
+                               position if finished else NULL, position if finished else "R", position, points,
+                               60 if finished else rng.randint(0, 59), time, NULL, NULL, NULL, NULL, NULL, status))
+        if position == 1:
+            driver_wins[driver] = driver_wins.get(driver, 0) + 1
+            team_wins[team] = team_wins.get(team, 0) + 1
+    for driver, team in entrants:
+        driver_points.setdefault(driver, 0)
+        team_points.setdefault(team, 0)
+
+    teams = {team for _, team in entrants}
+    for team in teams:
+        tables["constructor_results"].add((race_id, team, sum(race_points.get(driver, 0) for driver, entrant_team in entrants
+                                                              if entrant_team == team), NULL))
+    for position, driver in enumerate(sorted(driver_points, key=driver_points.get, reverse=True), 1):
+        tables["driver_standings"].add((race_id, driver, driver_points[driver], position, position, driver_wins.get(driver, 0)))
+    for position, team in enumerate(sorted(team_points, key=team_points.get, reverse=True), 1):
+        tables["constructor_standings"].add((race_id, team, team_points[team], position, position, team_wins.get(team, 0)))
+
+def get_option(args, name, default, parse=int):
+    for arg in args:
+        if arg.startswith(f"--{name}="):
+            return parse(arg.split("=", 1)[1])
+    return default
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        print("usage: python benchmarks/synthetic.py <dir> [--series=N] [--seed=N] [--seasons=N] [--first-year=N] [--races=N] [--field=N] [--sprint-rate=R] [--dnf-rate=R]")
+        sys.exit(1)
+    races = generate(args[0], seed=get_option(sys.argv, "seed", 0), series=get_option(sys.argv, "series", 1),
+                     seasons=get_option(sys.argv, "seasons", 77), first_year=get_option(sys.argv, "first-year", None),
+                     races_per_season=get_option(sys.argv, "races", 15),
+                     field_size=get_option(sys.argv, "field", 22),
+                     sprint_rate=get_option(sys.argv, "sprint-rate", 0.25, float),
+                     dnf_rate=get_option(sys.argv, "dnf-rate", 0.2, float))
+    print(f"Wrote {races} races to {args[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,20 @@
 from .dataclasses import *
-from .fetch import *
 from .prints import *
 from .compute import *
-from .plots import *
 from .files import *
 from .config import *
+from .checkpoint import *
+from .snapshot import *
+from .names import *
+from .profiling import report, stage
 
 import os
-import matplotlib.pyplot as plt
-import matplotlib as mpl
+from dataclasses import replace
 from datetime import datetime
 import pickle
 
 class F1Ratings:
-    def __init__(self, linewidth=PLOT_LINEWIDTH, markersize=PLOT_MARKERSIZE, colormap=PLOT_COLORMAP):
+    def __init__(self, linewidth=PLOT_LINEWIDTH, markersize=PLOT_MARKERSIZE, colormap=PLOT_COLORMAP, downsample=PLOT_DOWNSAMPLE):
         self.drivers = []
         self.teams = []
         self.races = []
@@ -21,26 +22,43 @@ class F1Ratings:
         self.sprints = []
         self.seasons = []
         self.statuses = []
-        mpl.rcParams['lines.linewidth'] = linewidth
-        mpl.rcParams['lines.markersize'] = markersize
+        self.checkpoint = None
+        self.participation = None # who raced when, built from the fetched races
+        self.grid = None # (driver ids, team ids) of the last race, kept in snapshots
+        self.names = None # (driver NameIndex, team NameIndex), built on the first lookup
+        self.linewidth = linewidth
+        self.markersize = markersize
+        self.downsample = downsample # "lttb", "minmax" or None to plot every rating
         try:
             os.makedirs("ratings", exist_ok=True)
         except OSError as e:
             print(f"Error creating directory: {e}")
             exit(1)
 
-    def fetch(self):
-        data = fetch_data()
+    def fetch(self, source=DATASET_DIR, loader=FETCH_LOADER, cache_dir=CACHE_DIR):
+        if loader not in ("csv", "pandas"):
+            raise ValueError(f"Unknown loader '{loader}'.")
+        if source is not None and loader == "csv": # pandas and kagglehub are not imported
+            from .fetch_csv import fetch_data, get_drivers, get_teams, get_races, get_qualis, get_sprints, get_statuses, compile_seasons
+        else:
+            from .fetch import fetch_data, get_drivers, get_teams, get_races, get_qualis, get_sprints, get_statuses, compile_seasons
+        with stage("fetch"):
+            data = fetch_data(source, cache_dir=cache_dir)
         if not data:
             raise ValueError("No data fetched from the source.")
 
-        self.drivers = get_drivers(data)
-        self.teams = get_teams(data)
-        self.races = get_races(data)
-        self.qualis = get_qualis(data)
-        self.sprints = get_sprints(data)
-        self.seasons = compile_seasons(self.races)
-        self.statuses = get_statuses(data)
+        with stage("ingest"):
+            self.drivers = get_drivers(data)
+            self.teams = get_teams(data)
+            self.races = get_races(data)
+            self.qualis = get_qualis(data)
+            self.sprints = get_sprints(data)
+            self.seasons = compile_seasons(self.races)
+            self.statuses = get_statuses(data)
+            self.participation = build_participation(self.seasons)
+            set_race_dates(self.participation, self.drivers, self.teams)
+        self.grid = self.participation.grid
+        self.names = None
 
         if not self.drivers:
             raise ValueError("No drivers found in the fetched data.")
@@ -57,229 +75,340 @@ class F1Ratings:
         if not self.statuses:
             raise ValueError("No statuses found in the fetched data.")
 
-    def compute(self):
-        self.drivers, self.teams = compute_ratings(
-            self.seasons, self.drivers, self.teams, self.qualis, self.sprints, self.statuses
-        )
+    def compute(self, previous=None, params=DEFAULT_PARAMETERS):
+        # with previous (saved ratings of an earlier gen) only races after its checkpoint are computed
+        checkpoint = None
+        if previous is not None:
+            reason = check_checkpoint(getattr(previous, "checkpoint", None),
+                                      self.seasons, self.teams, self.qualis, self.sprints, params, self.participation)
+            if reason is None:
+                checkpoint = previous.checkpoint
+                self.carry_histories(previous)
+                report(1, f"Computing ratings incrementally from {checkpoint}...")
+            else:
+                report(1, f"Computing all ratings, cannot compute incrementally: {reason}.")
+        with stage("compute"):
+            self.drivers, self.teams = compute_ratings(
+                self.seasons, self.drivers, self.teams, self.qualis, self.sprints, self.statuses,
+                checkpoint=checkpoint, params=params, participation=self.participation
+            )
+        with stage("checkpoint"):
+            self.checkpoint = make_checkpoint(self.seasons, self.teams, self.qualis, self.sprints, params, self.participation)
+
+    def sweep(self, param_sets, processes=SWEEP_PROCESSES):
+        # ratings for each parameter set, computed from scratch and returned as RatingTables; own ratings are untouched
+        from .sweep import run_sweep
+        return run_sweep(self, param_sets, processes=processes)
+
+    def calibrate(self, constraints, bounds=None, processes=SWEEP_PROCESSES, seed=None):
+        # parameters meeting the constraints as closely as found, pass them to compute(params=...) to use them
+        from .calibration import calibrate
+        params, _ = calibrate(self, constraints, bounds=bounds, processes=processes, seed=seed)
+        return params
+
+    def carry_histories(self, previous):
+        previous_drivers = {driver.id: driver for driver in previous.drivers}
+        previous_teams = {team.id: team for team in previous.teams}
+        for driver in self.drivers:
+            if driver.id in previous_drivers:
+                driver.ratings = previous_drivers[driver.id].ratings
+        for team in self.teams:
+            if team.id in previous_teams:
+                team.ratings = previous_teams[team.id].ratings
 
     def save(self, name="f1ratings"):
-        with open(f"ratings/{name}.f1", 'wb') as f:
-            pickle.dump(self, f)
+        with stage("save"):
+            save_snapshot(f"ratings/{name}.f1", self.drivers, self.teams, self.checkpoint, self.grid)
 
     def load(self, name="f1ratings"):
-        with open(f"ratings/{name}.f1", 'rb') as f:
+        # only drivers, teams and their histories are loaded, races and sessions are not part of a snapshot
+        path = f"ratings/{name}.f1"
+        if not is_snapshot(path):
+            self.load_pickle(path)
+            return
+        self.races, self.qualis, self.sprints, self.seasons, self.statuses = [], [], [], [], []
+        self.participation = None
+        with stage("load"):
+            self.drivers, self.teams, self.checkpoint, self.grid = load_snapshot(path)
+        self.names = None
+
+    def load_pickle(self, path):
+        # ratings saved as a pickled F1Ratings before snapshots
+        with open(path, 'rb') as f:
             obj = pickle.load(f)
         if not isinstance(obj, F1Ratings):
             raise ValueError("Loaded object is not an instance of F1Ratings.")
+        style = (self.linewidth, self.markersize, self.downsample)
         self.__dict__.clear()
         self.__dict__.update(obj.__dict__)
+        self.linewidth, self.markersize, self.downsample = style
+        self.checkpoint = getattr(self, "checkpoint", None)
+        self.participation = build_participation(self.seasons)
+        self.grid = self.participation.grid
+        self.names = None
+        for entity in self.drivers + self.teams:
+            if isinstance(entity.ratings, list): # saved before histories were compact
+                entity.ratings = RatingHistory(entity.ratings)
+
+    def get_grid(self):
+        # (drivers, teams) of the last race
+        if self.participation is not None:
+            return get_last_race_drivers(self.drivers, self.participation), get_last_race_teams(self.teams, self.participation)
+        if self.grid is None:
+            return [], []
+        driver_ids, team_ids = set(self.grid[0]), set(self.grid[1])
+        return ([driver for driver in self.drivers if driver.id in driver_ids],
+                [team for team in self.teams if team.id in team_ids])
+
+    def plots(self):
+        # matplotlib is only imported once something is plotted, read-only commands start without it
+        from . import plots
+        plots.mpl.rcParams['lines.linewidth'] = self.linewidth
+        plots.mpl.rcParams['lines.markersize'] = self.markersize
+        return plots
 
     def dump_ratings(self):
         save_ratings(self.teams, self.drivers)
 
+    def name_indexes(self):
+        if self.names is None:
+            self.names = (driver_index(self.drivers), team_index(self.teams))
+        return self.names
+
     def get_driver_by_name(self, driver_name):
-        driver = get_driver_by_name(self.drivers, driver_name)
-        return driver
+        # full name or unique surname only, partial and misspelled names are left to find
+        return self.name_indexes()[0].find(driver_name, EXACT_STAGES)
 
     def get_team_by_name(self, team_name):
-        team = get_team_by_name(self.teams, team_name)
-        return team
+        return self.name_indexes()[1].find(team_name, EXACT_STAGES)
+
+    def resolve_driver(self, driver):
+        # the plot and print methods take a Driver as well as a name, a Driver is used without a lookup
+        return driver if isinstance(driver, Driver) else self.get_driver_by_name(driver)
+
+    def resolve_team(self, team):
+        return team if isinstance(team, Team) else self.get_team_by_name(team)
+
+    def find(self, name):
+        # driver or team by full, partial or misspelled name, drivers are tried before teams at each step
+        return find_by_name(name, self.name_indexes())
+
+    def match(self, name):
+        # find, also returning the names.STAGES stage that found the name
+        return match_by_name(name, self.name_indexes())
 
     def print_today_grid(self):
-        print_today_grid(self.teams, self.drivers, self.races)
+        drivers, teams = self.get_grid()
+        print_today_grid(self.teams, self.drivers, teams, drivers)
 
     def show_plot_today_grid(self):
-        drivers = get_last_race_drivers(self.drivers, self.races)
-        teams = get_last_race_teams(self.teams, self.races)
-        plt_drivers = plot_drivers_rating(drivers, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date())
-        plt_teams = plot_teams_rating(teams, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date())
-        if plt_drivers is None or plt_teams is None:
+        drivers, teams = self.get_grid()
+        figure_drivers = self.plots().plot_drivers_rating(drivers, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date(), downsample=self.downsample)
+        figure_teams = self.plots().plot_teams_rating(teams, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date(), downsample=self.downsample)
+        if figure_drivers is None or figure_teams is None:
             raise ValueError("No data available for plotting.")
-        plt_drivers.show()
-        plt_teams.show()
-        plt_drivers.close()
-        plt_teams.close()
+        self.plots().show(figure_drivers, figure_teams)
 
     def save_plot_today_grid(self, name="current_grid"):
-        drivers = get_last_race_drivers(self.drivers, self.races)
-        teams = get_last_race_teams(self.teams, self.races)
-        plt_drivers = plot_drivers_rating(drivers, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date())
-        plt_teams = plot_teams_rating(teams, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date())
-        if plt_drivers is None or plt_teams is None:
+        drivers, teams = self.get_grid()
+        plots = self.plots()
+        figure_drivers = plots.plot_drivers_rating(drivers, datetime(1950, 1, 1).date(), datetime.now().date(), plots.new_figure(), downsample=self.downsample)
+        figure_teams = plots.plot_teams_rating(teams, datetime(1950, 1, 1).date(), datetime.now().date(), plots.new_figure(), downsample=self.downsample)
+        if figure_drivers is None or figure_teams is None:
             raise ValueError("No data available for plotting.")
-        plt_drivers.savefig(f"ratings/{name}_drivers.png", dpi=300)
-        plt_teams.savefig(f"ratings/{name}_teams.png", dpi=300)
-        plt_drivers.close()
-        plt_teams.close()
+        figure_drivers.savefig(f"ratings/{name}_drivers.png", dpi=PLOT_DPI)
+        figure_teams.savefig(f"ratings/{name}_teams.png", dpi=PLOT_DPI)
 
     def show_plot_driver_rating(self, driver_name, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        driver = get_driver_by_name(self.drivers, driver_name)
+        driver = self.resolve_driver(driver_name)
         if not driver:
             raise ValueError(f"Driver '{driver_name}' not found.")
-        plt = plot_driver_rating(driver, startdate, enddate)
-        if plt is None:
+        figure = self.plots().plot_driver_rating(driver, startdate, enddate, downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.show()
-        plt.close()
+        self.plots().show(figure)
 
     def show_plot_drivers_rating(self, driver_names, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        drivers = [get_driver_by_name(self.drivers, name) for name in driver_names]
+        drivers = [self.resolve_driver(name) for name in driver_names]
         if not all(drivers):
             for name in driver_names:
-                if not get_driver_by_name(self.drivers, name):
+                if not self.resolve_driver(name):
                     raise ValueError(f"Driver '{name}' not found.")
-        plt = plot_drivers_rating(drivers, startdate, enddate)
-        if plt is None:
+        figure = self.plots().plot_drivers_rating(drivers, startdate, enddate, downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.show()
-        plt.close()
+        self.plots().show(figure)
 
     def show_plot_team_rating(self, team_name, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        team = get_team_by_name(self.teams, team_name)
+        team = self.resolve_team(team_name)
         if not team:
             raise ValueError(f"Team '{team_name}' not found.")
-        plt = plot_team_rating(team, startdate, enddate)
-        if plt is None:
+        figure = self.plots().plot_team_rating(team, startdate, enddate, downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.show()
-        plt.close()
+        self.plots().show(figure)
 
     def show_plot_teams_rating(self, team_names, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        teams = [get_team_by_name(self.teams, name) for name in team_names]
+        teams = [self.resolve_team(name) for name in team_names]
         if not all(teams):
             for name in team_names:
-                if not get_team_by_name(self.teams, name):
+                if not self.resolve_team(name):
                     raise ValueError(f"Team '{name}' not found.")
-        plt = plot_teams_rating(teams, startdate, enddate)
-        if plt is None:
+        figure = self.plots().plot_teams_rating(teams, startdate, enddate, downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.show()
-        plt.close()
+        self.plots().show(figure)
 
     def show_plot_team_and_driver(self, team_name, driver_name, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        team = get_team_by_name(self.teams, team_name)
-        driver = get_driver_by_name(self.drivers, driver_name)
+        team = self.resolve_team(team_name)
+        driver = self.resolve_driver(driver_name)
         if not team and not driver:
             raise ValueError(f"Team '{team_name}' and Driver '{driver_name}' not found.")
         elif not team:
             raise ValueError(f"Team '{team_name}' not found.")
         elif not driver:
             raise ValueError(f"Driver '{driver_name}' not found.")
-        plt = plot_team_and_driver_rating(team, driver, startdate, enddate)
-        if plt is None:
+        figure = self.plots().plot_team_and_driver_rating(team, driver, startdate, enddate, downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.show()
-        plt.close()
+        self.plots().show(figure)
 
     def show_plot_teams_and_drivers(self, team_names, driver_names, startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        teams = [get_team_by_name(self.teams, name) for name in team_names]
-        drivers = [get_driver_by_name(self.drivers, name) for name in driver_names]
+        teams = [self.resolve_team(name) for name in team_names]
+        drivers = [self.resolve_driver(name) for name in driver_names]
         if not all(teams) or not all(drivers):
             for name in team_names:
-                if not get_team_by_name(self.teams, name):
+                if not self.resolve_team(name):
                     raise ValueError(f"Team '{name}' not found.")
             for name in driver_names:
-                if not get_driver_by_name(self.drivers, name):
+                if not self.resolve_driver(name):
                     raise ValueError(f"Driver '{name}' not found.")
-        plt = plot_teams_and_drivers(teams, drivers, startdate, enddate)
-        if plt is None:
+        figure = self.plots().plot_teams_and_drivers(teams, drivers, startdate, enddate, downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.show()
-        plt.close()
+        self.plots().show(figure)
 
     def save_plot_driver_rating(self, driver_name, name="driver_rating_progression", startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        driver = get_driver_by_name(self.drivers, driver_name)
+        driver = self.resolve_driver(driver_name)
         if not driver:
             raise ValueError(f"Driver '{driver_name}' not found.")
-        plt = plot_driver_rating(driver, name, startdate, enddate)
-        if plt is None:
+        plots = self.plots()
+        figure = plots.plot_driver_rating(driver, startdate, enddate, plots.new_figure(), downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.savefig(f"ratings/{name}.png", dpi=300)
-        plt.close()
+        figure.savefig(f"ratings/{name}.png", dpi=PLOT_DPI)
 
     def save_plot_drivers_rating(self, driver_names, name="drivers_rating_progression", startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        drivers = [get_driver_by_name(self.drivers, name) for name in driver_names]
+        drivers = [self.resolve_driver(name) for name in driver_names]
         if not all(drivers):
             for name in driver_names:
-                if not get_driver_by_name(self.drivers, name):
+                if not self.resolve_driver(name):
                     raise ValueError(f"Driver '{name}' not found.")
-        plt = plot_drivers_rating(drivers, name, startdate, enddate)
-        if plt is None:
+        plots = self.plots()
+        figure = plots.plot_drivers_rating(drivers, startdate, enddate, plots.new_figure(), downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.savefig(f"ratings/{name}.png", dpi=300)
-        plt.close()
+        figure.savefig(f"ratings/{name}.png", dpi=PLOT_DPI)
 
     def save_plot_team_rating(self, team_name, name="team_rating_progression", startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        team = get_team_by_name(self.teams, team_name)
+        team = self.resolve_team(team_name)
         if not team:
             raise ValueError(f"Team '{team_name}' not found.")
-        plt = plot_team_rating(team, name, startdate, enddate)
-        if plt is None:
+        plots = self.plots()
+        figure = plots.plot_team_rating(team, startdate, enddate, plots.new_figure(), downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.savefig(f"ratings/{name}.png", dpi=300)
-        plt.close()
+        figure.savefig(f"ratings/{name}.png", dpi=PLOT_DPI)
 
     def save_plot_teams_rating(self, team_names, name="teams_rating_progression", startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        teams = [get_team_by_name(self.teams, name) for name in team_names]
+        teams = [self.resolve_team(name) for name in team_names]
         if not all(teams):
             raise ValueError("One or more teams not found.")
-        plt = plot_teams_rating(teams, name, startdate, enddate)
-        if plt is None:
+        plots = self.plots()
+        figure = plots.plot_teams_rating(teams, startdate, enddate, plots.new_figure(), downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.savefig(f"ratings/{name}.png", dpi=300)
-        plt.close()
+        figure.savefig(f"ratings/{name}.png", dpi=PLOT_DPI)
 
     def save_plot_team_and_driver(self, team_name, driver_name, name="team_vs_driver_rating_progression", startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        team = get_team_by_name(self.teams, team_name)
-        driver = get_driver_by_name(self.drivers, driver_name)
+        team = self.resolve_team(team_name)
+        driver = self.resolve_driver(driver_name)
         if not team and not driver:
             raise ValueError(f"Team '{team_name}' and Driver '{driver_name}' not found.")
         elif not team:
             raise ValueError(f"Team '{team_name}' not found.")
         elif not driver:
             raise ValueError(f"Driver '{driver_name}' not found.")
-        plt = plot_team_and_driver_rating(team, driver, name, startdate, enddate)
-        if plt is None:
+        plots = self.plots()
+        figure = plots.plot_team_and_driver_rating(team, driver, startdate, enddate, plots.new_figure(), downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.savefig(f"ratings/{name}.png", dpi=300)
-        plt.close()
+        figure.savefig(f"ratings/{name}.png", dpi=PLOT_DPI)
 
     def save_plot_teams_and_drivers(self, team_names, driver_names, name="teams_vs_drivers_rating_progression", startdate=datetime(1950, 1, 1).date(), enddate=datetime.now().date()):
-        teams = [get_team_by_name(self.teams, name) for name in team_names]
-        drivers = [get_driver_by_name(self.drivers, name) for name in driver_names]
+        teams = [self.resolve_team(name) for name in team_names]
+        drivers = [self.resolve_driver(name) for name in driver_names]
         if not all(teams) or not all(drivers):
             for name in team_names:
-                if not get_team_by_name(self.teams, name):
+                if not self.resolve_team(name):
                     raise ValueError(f"Team '{name}' not found.")
             for name in driver_names:
-                if not get_driver_by_name(self.drivers, name):
+                if not self.resolve_driver(name):
                     raise ValueError(f"Driver '{name}' not found.")
-        plt = plot_teams_and_drivers(teams, drivers, name, startdate, enddate)
-        if plt is None:
+        plots = self.plots()
+        figure = plots.plot_teams_and_drivers(teams, drivers, startdate, enddate, plots.new_figure(), downsample=self.downsample)
+        if figure is None:
             raise ValueError("No data available for plotting.")
-        plt.savefig(f"ratings/{name}.png", dpi=300)
-        plt.close()
+        figure.savefig(f"ratings/{name}.png", dpi=PLOT_DPI)
+
+    def export_plots(self, jobs, processes=PLOT_PROCESSES):
+        # renders a list of PlotJob in parallel, returns the paths written
+        from .export import export_plots
+        resolved = []
+        for job in jobs:
+            drivers = [self.resolve_driver(name) for name in job.drivers]
+            teams = [self.resolve_team(name) for name in job.teams]
+            for name, driver in zip(job.drivers, drivers):
+                if not driver:
+                    raise ValueError(f"Driver '{name}' not found.")
+            for name, team in zip(job.teams, teams):
+                if not team:
+                    raise ValueError(f"Team '{name}' not found.")
+            resolved.append(replace(job, drivers=drivers, teams=teams))
+        style = {'lines.linewidth': self.linewidth, 'lines.markersize': self.markersize}
+        return export_plots(resolved, self.get_grid(), style, processes, self.downsample)
+
+    def grid_plot_jobs(self, directory="ratings/export", format="png"):
+        # a plot for every driver and team on the grid and the two grid plots
+        drivers, teams = self.get_grid()
+        jobs = [PlotJob("grid", os.path.join(directory, f"grid.{format}"))]
+        for driver in drivers:
+            driver_name = f"{driver.forename} {driver.surname}"
+            jobs.append(PlotJob("driver", os.path.join(directory, "drivers", f"{file_name(driver_name)}.{format}"), drivers=[driver]))
+        for team in teams:
+            jobs.append(PlotJob("team", os.path.join(directory, "teams", f"{file_name(team.name)}.{format}"), teams=[team]))
+        return jobs
 
     def print_driver_rating(self, driver_name):
-        driver = get_driver_by_name(self.drivers, driver_name)
+        driver = self.resolve_driver(driver_name)
         if not driver:
             raise ValueError(f"Driver '{driver_name}' not found.")
         print_driver_rating(driver)
 
     def print_team_rating(self, team_name):
-        team = get_team_by_name(self.teams, team_name)
+        team = self.resolve_team(team_name)
         if not team:
             raise ValueError(f"Team '{team_name}' not found.")
         print_team_rating(team)
 
     def print_driver_last_change(self, driver_name):
-        driver = get_driver_by_name(self.drivers, driver_name)
+        driver = self.resolve_driver(driver_name)
         if not driver:
             raise ValueError(f"Driver '{driver_name}' not found.")
         print_driver_last_change(driver)
 
     def print_team_last_change(self, team_name):
-        team = get_team_by_name(self.teams, team_name)
+        team = self.resolve_team(team_name)
         if not team:
             raise ValueError(f"Team '{team_name}' not found.")
         print_team_last_change(team)
@@ -0,0 +1,178 @@
+import math
+import os
+from contextlib import redirect_stdout
+from dataclasses import fields, replace
+
+import numpy as np
+
+from .config import *
+from .dataclasses import *
+from .compute import *
+from .helpers import *
+from .names import *
+from .pool import *
+from .profiling import report
+from .sweep import *
+
+# Searches the rating parameters for a set that satisfies anchor constraints, e.g.
+#   Constraint("driver", "Michael Schumacher", low=2400)
+#   Constraint("driver", "Lance Stroll", stat="rating", high=1300)
+#   Constraint("team", "Ferrari", above="Minardi")
+# The loss is the total number of rating points by which the constraints are missed.
+# A (1+λ) evolution strategy samples candidates around the best parameters so far and evaluates them in parallel.
+# Every CALIBRATION_CHECKPOINT_SEASONS seasons a candidate is stopped once the loss it has already locked in
+# (misses of drivers/teams that no longer race, peaks already above their limit) is no better than the best run.
+
+FIXED_PARAMETERS = ["current_season_length", "base_driver_rating", "base_team_rating", "rookie_rating_count"]
+
+def default_bounds(params=DEFAULT_PARAMETERS):
+    # every tunable numeric parameter between half and double its value
+    bounds = {}
+    for field in fields(params):
+        value = getattr(params, field.name)
+        if field.name in FIXED_PARAMETERS or isinstance(value, bool) or not value:
+            continue
+        bounds[field.name] = (min(value / 2, value * 2), max(value / 2, value * 2))
+    return bounds
+
+def resolve_constraints(constraints, drivers, teams):
+    # (constraint, index, above index) with names replaced by positions in drivers/teams
+    indexes = {"driver": (drivers, driver_index(drivers)), "team": (teams, team_index(teams))}
+    resolved = []
+    for constraint in constraints:
+        if constraint.entity not in indexes:
+            raise ValueError(f"Unknown constraint entity '{constraint.entity}'.")
+        if constraint.stat not in ("peak", "rating"):
+            raise ValueError(f"Unknown constraint stat '{constraint.stat}'.")
+        entities, names = indexes[constraint.entity]
+        positions = {id(entity): i for i, entity in enumerate(entities)}
+        indices = []
+        for name in [constraint.name] + ([constraint.above] if constraint.above is not None else []):
+            entity = names.find(name, EXACT_STAGES) # a guessed name would calibrate against the wrong entity
+            if entity is None:
+                raise ValueError(f"{constraint.entity.capitalize()} '{name}' not found, names are not guessed in constraints.")
+            indices.append(positions[id(entity)])
+        resolved.append((constraint, indices[0], indices[1] if len(indices) > 1 else None))
+    return resolved
+
+def last_seasons(participation, drivers, teams):
+    # last year each driver/team raced, aligned with drivers/teams (0 for never)
+    return ([participation.driver_seasons.get(driver.id, [0])[-1] for driver in drivers],
+            [participation.team_seasons.get(team.id, [0])[-1] for team in teams])
+
+def _stat(entity, stat):
+    if not entity.ratings:
+        return None
+    return entity.ratings.peak_value if stat == "peak" else entity.ratings.current
+
+def constraint_loss(resolved, drivers, teams, settled=None):
+    # total rating points by which the constraints are missed
+    # with settled(entity, index) telling whether a driver/team can still change, only the misses that can no
+    # longer shrink are counted, which makes the result a lower bound of the final loss
+    loss = 0
+    for constraint, index, above_index in resolved:
+        entities = drivers if constraint.entity == "driver" else teams
+        value = _stat(entities[index], constraint.stat)
+        if value is None:
+            continue
+        final = settled is None or settled(constraint.entity, index)
+        if constraint.low is not None and final:
+            loss += max(0, constraint.low - value)
+        if constraint.high is not None and (final or constraint.stat == "peak"): # peaks only grow
+            loss += max(0, value - constraint.high)
+        if above_index is not None:
+            other = _stat(entities[above_index], constraint.stat)
+            other_final = settled is None or settled(constraint.entity, above_index)
+            if other is not None and final and (other_final or constraint.stat == "peak"):
+                loss += max(0, other - value)
+    return loss
+
+def _resume_point(seasons, year):
+    # compute_ratings only reads where to carry on from a checkpoint, the rest is for incremental gens
+    season = next(s for s in seasons if s.year == year)
+    return Checkpoint(season=year, season_races=len(season.races), season_team_ids=[], reentry_team_ids=[],
+                      team_ids=[], season_weights={}, history_digest="", config_digest="")
+
+def _evaluate(task):
+    # (params, loss, year it was stopped after or None for a complete run)
+    params, resolved, stops = task
+    (seasons, drivers, teams, qualis, sprints, statuses), (best, driver_last, team_last, features) = worker_state()
+    drivers, teams = fresh_entities(drivers, teams)
+    checkpoint = None
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for year in stops:
+            drivers, teams = compute_ratings(seasons, drivers, teams, qualis, sprints, statuses,
+                                             checkpoint=checkpoint, params=params, until=year,
+                                             features=features)
+            if year == stops[-1]:
+                break
+            def settled(entity, index):
+                if entity == "driver":
+                    return driver_last[index] <= year
+                return team_last[index] <= year and not params.reset_team_ratings_season
+            bound = constraint_loss(resolved, drivers, teams, settled)
+            if bound >= best.value:
+                return params, bound, year
+            checkpoint = _resume_point(seasons, year)
+    loss = constraint_loss(resolved, drivers, teams)
+    with best.get_lock():
+        if loss < best.value:
+            best.value = loss
+    return params, loss, None
+
+def calibrate(dataset, constraints, bounds=None, params=DEFAULT_PARAMETERS,
+              generations=CALIBRATION_GENERATIONS, population=CALIBRATION_POPULATION, processes=SWEEP_PROCESSES,
+              seed=None):
+    # (best parameters found, their loss), a loss of 0 means every constraint holds
+    # bounds maps Parameters field names to (low, high), the other fields keep their value from params
+    dataset = as_dataset(dataset)
+    seasons, drivers, teams = dataset[0], dataset[1], dataset[2]
+    resolved = resolve_constraints(constraints, drivers, teams)
+    if bounds is None:
+        bounds = default_bounds(params)
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    if np.any(high <= low):
+        raise ValueError("Calibration bounds must have low < high.")
+
+    years = [season.year for season in seasons if season.races]
+    if not years:
+        raise ValueError("No races to calibrate on.")
+    stops = years[CALIBRATION_CHECKPOINT_SEASONS - 1::CALIBRATION_CHECKPOINT_SEASONS]
+    if not stops or stops[-1] != years[-1]:
+        stops.append(years[-1])
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if population is None:
+        population = max(processes, 4)
+    best = pool_context().Value('d', math.inf)
+    features = dataset_features(dataset)
+    shared = (best, *last_seasons(build_participation(seasons), drivers, teams), features)
+    rng = np.random.default_rng(seed)
+
+    def candidate(u):
+        return replace(params, **{name: float(value) for name, value in zip(names, low + u * (high - low))})
+
+    u = np.clip((np.array([getattr(params, name) for name in names], dtype=float) - low) / (high - low), 0, 1)
+    best_params = candidate(u)
+    _, loss, _ = map_tasks(_evaluate, [(best_params, resolved, stops)], dataset, 1, shared)[0]
+    report(1, f"Calibrating {len(names)} parameters against {len(constraints)} constraints, starting loss {loss:.2f}...")
+
+    step = 0.15
+    for generation in range(1, generations + 1):
+        if loss == 0 or step < 1e-3:
+            break
+        samples = np.clip(u + step * rng.standard_normal((population, len(names))), 0, 1)
+        tasks = [(candidate(sample), resolved, stops) for sample in samples]
+        results = map_tasks(_evaluate, tasks, dataset, processes, shared)
+        complete = [i for i, result in enumerate(results) if result[2] is None]
+        winner = min(complete, key=lambda i: results[i][1], default=None)
+        if winner is not None and results[winner][1] < loss:
+            u, best_params, loss = samples[winner], results[winner][0], results[winner][1]
+            step *= 1.5
+        else:
+            step *= 0.7
+        report(1, f"\tGeneration {generation}: loss {loss:.2f} ({population - len(complete)} of {population} candidates stopped early)")
+    report(1, f"Calibrated {best_params} with loss {loss:.2f}")
+    return best_params, loss
@@ -0,0 +1,65 @@
+import hashlib
+
+from .config import *
+from .dataclasses import *
+from .helpers import *
+from .index import *
+
+def config_digest(params):
+    return hashlib.sha256(repr(params).encode()).hexdigest()
+
+def history_digest(seasons, qualis, sprints, season, season_races):
+    races = []
+    for s in seasons:
+        if s.year < season:
+            races.extend(s.races)
+        elif s.year == season:
+            races.extend(s.races[:season_races])
+    digest = hashlib.sha256()
+    for race_id, weekend in build_race_weekends(races, qualis, sprints).items():
+        quali = weekend.quali.results if weekend.quali else None
+        sprint = (weekend.sprint.results, weekend.sprint.starting_positions) if weekend.sprint else None
+        race = weekend.race
+        digest.update(repr((race_id, race.date, race.results, race.starting_positions, quali, sprint)).encode())
+    return digest.hexdigest()
+
+def make_checkpoint(seasons, teams, qualis, sprints, params=DEFAULT_PARAMETERS, participation=None):
+    if not seasons:
+        return None
+    season = seasons[-1]
+    if participation is None:
+        participation = build_participation(seasons)
+    return Checkpoint(
+        season=season.year,
+        season_races=len(season.races),
+        season_team_ids=season_team_ids(participation, season.year),
+        reentry_team_ids=reentry_team_ids(participation, season.year),
+        team_ids=sorted(team.id for team in teams),
+        season_weights=season_weights(seasons, params),
+        history_digest=history_digest(seasons, qualis, sprints, season.year, len(season.races)),
+        config_digest=config_digest(params)
+    )
+
+def check_checkpoint(checkpoint, seasons, teams, qualis, sprints, params=DEFAULT_PARAMETERS, participation=None):
+    # None when computing on from the checkpoint gives the same ratings as a full rebuild, else the reason why not
+    if checkpoint is None:
+        return "no checkpoint"
+    if checkpoint.config_digest != config_digest(params):
+        return "parameters changed"
+    season = next((s for s in seasons if s.year == checkpoint.season), None)
+    if season is None or len(season.races) < checkpoint.season_races:
+        return "races before the checkpoint are missing"
+    weights = season_weights(seasons, params)
+    if participation is None:
+        participation = build_participation(seasons)
+    if any(weights.get(year) != weight for year, weight in checkpoint.season_weights.items()):
+        return "season weights changed"
+    if params.rerate_team_ratings_season and season_team_ids(participation, season.year) != checkpoint.season_team_ids:
+        return f"teams racing in {season.year} changed"
+    if params.reset_team_reentry_ratings and reentry_team_ids(participation, season.year) != checkpoint.reentry_team_ids:
+        return f"teams re-entering in {season.year} changed"
+    if params.reset_team_ratings_season and any(team.id not in checkpoint.team_ids for team in teams):
+        return "new teams"
+    if history_digest(seasons, qualis, sprints, checkpoint.season, checkpoint.season_races) != checkpoint.history_digest:
+        return "historical results changed"
+    return None
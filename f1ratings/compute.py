@@ -1,154 +1,103 @@
+import time
 from math import exp
 from .config import *
 from .dataclasses import *
 from .compute_driver import *
 from .compute_team import *
+from .features import *
 from .helpers import *
+from .index import *
+from .profiling import report, record
 
-def compute_ratings(seasons, drivers, teams, qualis, sprints, statuses):
+def compute_ratings(seasons, drivers, teams, qualis, sprints, statuses, checkpoint=None, params=DEFAULT_PARAMETERS, until=None, participation=None, features=None):
+    # with a checkpoint, drivers and teams carry their histories up to it and only later races are computed
+    # with until, seasons after that year are left for a later call that continues from a checkpoint
+    # features (race id -> RaceFeatures, see build_features) can be shared by runs on the same dataset
     for driver in drivers:
-        driver.ratings.append((BASE_DRIVER_RATING, None))
-    if not RESET_TEAM_RATINGS_SEASON or not RERATE_TEAM_RATINGS_SEASON:
+        if checkpoint is None or not driver.ratings:
+            driver.ratings.append((params.base_driver_rating, None))
+    if not params.reset_team_ratings_season or not params.rerate_team_ratings_season:
         for team in teams:
-            team.ratings.append((BASE_TEAM_RATING, None))
-
-    most_races_in_season = 0
-    for season in seasons:
-        if len(season.races) > most_races_in_season:
-            most_races_in_season = len(season.races)
-
-    for season in seasons:
-        print(f"Computing ratings for season {season.year}...")
-        if RESET_TEAM_RATINGS_SEASON:
-            for team in teams:
-                team.ratings.append((BASE_TEAM_RATING, None)) # reset team ratings at the start of each season
-        if RERATE_TEAM_RATINGS_SEASON:
-            teams = rerate_teams(season, teams)
-
-        if RESET_TEAM_REENTRY_RATINGS:
-            teams = reset_team_reentry_ratings(seasons, season, teams)
-
-        season_len = len(season.races)
-        if season.year == datetime.now().year:
-            season_len = CURRENT_SEASON_LENGTH
-        num_races_weight = most_races_in_season / season_len
-        num_races_weight_scaled = influence_function(num_races_weight, a=NUM_RACES_INFLUENCE_TREND, b=NUM_RACES_INFLUENCE_STEEPNESS)
-
-        for race in season.races:
-            print(f"\tComputing ratings for race {race.name}...")
+            if checkpoint is None or not team.ratings:
+                team.ratings.append((params.base_team_rating, None))
+
+    drivers_by_id = index_by_id(drivers)
+    teams_by_id = index_by_id(teams)
+    if features is None:
+        features_started = time.perf_counter()
+        remaining = [race for _, races, _ in remaining_races(seasons, checkpoint, until) for race in races]
+        features = build_features(remaining, build_race_weekends(remaining, qualis, sprints), statuses)
+        record("compute.features", time.perf_counter() - features_started)
+
+    weights = season_weights(seasons, params)
+    if participation is None:
+        participation = build_participation(seasons)
+
+    for season, races, season_start in remaining_races(seasons, checkpoint, until):
+        report(1, f"Computing ratings for season {season.year}...")
+        season_started = time.perf_counter()
+        if season_start:
+            if params.reset_team_ratings_season:
+                for team in teams:
+                    team.ratings.append((params.base_team_rating, None)) # reset team ratings at the start of each season
+            if params.rerate_team_ratings_season:
+                teams = rerate_teams(season, teams, participation, params)
+
+            if params.reset_team_reentry_ratings:
+                teams = reset_team_reentry_ratings(season, teams, participation, params)
+
+        num_races_weight = weights[season.year]
+        num_races_weight_scaled = influence_function(num_races_weight, a=params.num_races_influence_trend, b=params.num_races_influence_steepness)
+        rookie_rating_count_scaled = params.rookie_rating_count / num_races_weight_scaled
+        if rookie_rating_count_scaled < 2:
+            rookie_rating_count_scaled = 2
+
+        for race in races:
+            report(2, f"\tComputing ratings for race {race.name}...")
+            drivers_started = time.perf_counter()
+            prep = features[race.id]
             numDrivers = len(race.results)
-            teams_positions_races = {}
-            teams_positions_qualis = {}
-            teams_positions_sprints = {}
-            drivers_decays = compute_drivers_rating_decay(drivers, DRIVER_RATING_DECAY_NUM_RACES, num_races_weight)
-            for driver_result in race.results:
-                diff_teammates = compute_teammate_place_diff(drivers, statuses,
-                                                             driver_result[0], driver_result[1], driver_result[2], driver_result[3],
-                                                             race.results, numDrivers)
-                penalty = False
-                if driver_result[3] is not None and is_driver_fault(driver_result[3], statuses):
-                    penalty = True
-
-                race_starting_pos = next((pos for pos in race.starting_positions if pos[0] == driver_result[0]), None)
-
-                race_quali = next((quali for quali in qualis if quali.race_id == race.id ), None)
-                if race_quali is None:
-                    quali_result = None
-                else:
-                    quali_result = next((result for result in race_quali.results if result[0] == driver_result[0]), None)
-
-                race_sprint = next((sprint for sprint in sprints if sprint.race_id == race.id), None)
-                if race_sprint is None:
-                    sprint_result = None
-                    sprint_starting_pos = None
-                else:
-                    sprint_result = next((result for result in race_sprint.results if result[0] == driver_result[0]), None)
-                    sprint_starting_pos = next((pos for pos in race_sprint.starting_positions if pos[0] == driver_result[0]), None)
-
-                race_bonus = distribution_function(driver_result[2], numDrivers, 5) if driver_result else 0
-                quali_bonus = distribution_function(quali_result[2], numDrivers, 5) if quali_result else 0
-                sprint_bonus = distribution_function(sprint_result[2], numDrivers, 5) if sprint_result else 0
-
-                race_bonus*=num_races_weight
-                quali_bonus*=num_races_weight
-
-                try:
-                    diff_race = race_starting_pos[1] - int(driver_result[2]) if race_starting_pos else 0
-                except (ValueError, TypeError):
-                    diff_race = 0
-                try:
-                    diff_sprint = sprint_starting_pos[1] - int(sprint_result[2]) if sprint_starting_pos else 0
-                except (ValueError, TypeError):
-                    diff_sprint = 0
-
-                sign = 1
-                if diff_race < 0:
-                    sign = -1
-                diff_race = distribution_function(abs(diff_race), numDrivers - 1, 5) * sign
-                sign = 1
-                if diff_sprint < 0:
-                    sign = -1
-                diff_sprint = distribution_function(abs(diff_sprint), numDrivers - 1, 5) * sign
-
-                diff_race*=num_races_weight
-
-                driver_team_rating = next((t for t in teams if t.id == driver_result[1]), None)
-                driver_team_rating = driver_team_rating.ratings[-1][0] if driver_team_rating else BASE_TEAM_RATING
-                diff_team_performance = driver_team_rating - BASE_TEAM_RATING
-
-                if driver_result[1] not in teams_positions_races:
-                    teams_positions_races[driver_result[1]] = []
-                try:
-                    race_pos = int(driver_result[2])
-                except (ValueError, TypeError):
-                    race_pos = numDrivers
-                teams_positions_races[driver_result[1]].append((driver_result[0], race_pos))
-
-                if driver_result[1] not in teams_positions_qualis:
-                    teams_positions_qualis[driver_result[1]] = []
-                if quali_result:
-                    try:
-                        quali_pos = int(quali_result[2])
-                    except (ValueError, TypeError):
-                        quali_pos = numDrivers
-                    teams_positions_qualis[driver_result[1]].append((driver_result[0], quali_pos))
-
-                if driver_result[1] not in teams_positions_sprints:
-                    teams_positions_sprints[driver_result[1]] = []
-                if sprint_result:
-                    try:
-                        sprint_pos = int(sprint_result[2])
-                    except (ValueError, TypeError):
-                        sprint_pos = numDrivers
-                    teams_positions_sprints[driver_result[1]].append((driver_result[0], sprint_pos))
-
-                rookie_rating_count_scaled = ROOKIE_RATING_COUNT / num_races_weight_scaled
-                if rookie_rating_count_scaled < 2:
-                    rookie_rating_count_scaled = 2
-
-                driver = next((d for d in drivers if d.id == driver_result[0]), None)
+            # only entrants decay in a race, so only their decays are computed, from their ratings before the race
+            entrants = [drivers_by_id[driver_id] for driver_id in dict.fromkeys(result[0] for result in race.results)
+                        if driver_id in drivers_by_id]
+            drivers_decays = compute_drivers_rating_decay(entrants, params.driver_rating_decay_num_races, num_races_weight, params)
+            for i, driver_result in enumerate(race.results):
+                diff_teammates = compute_teammate_place_diff(drivers_by_id, driver_result[0], prep.teammates[i], numDrivers)
+                penalty = prep.penalty[i]
+
+                race_bonus = prep.race_bonus[i] * num_races_weight
+                quali_bonus = prep.quali_bonus[i] * num_races_weight
+                sprint_bonus = prep.sprint_bonus[i]
+                diff_race = prep.diff_race[i] * num_races_weight
+                diff_sprint = prep.diff_sprint[i]
+
+                driver_team_rating = teams_by_id.get(driver_result[1])
+                driver_team_rating = driver_team_rating.ratings.current if driver_team_rating else params.base_team_rating
+                diff_team_performance = driver_team_rating - params.base_team_rating
+
+                driver = drivers_by_id.get(driver_result[0])
                 if driver:
-                    driver_rating = driver.ratings[-1][0]
-                    if len(driver.ratings) < rookie_rating_count_scaled and len(driver.ratings) < ROOKIE_RATING_COUNT:
-                        rookie_multiplier = 1 + ROOKIE_MODIFIER * (1 / (ROOKIE_RATING_COUNT - len(driver.ratings)))
+                    driver_rating = driver.ratings.current
+                    if len(driver.ratings) < rookie_rating_count_scaled and len(driver.ratings) < params.rookie_rating_count:
+                        rookie_multiplier = 1 + params.rookie_modifier * (1 / (params.rookie_rating_count - len(driver.ratings)))
                     else:
                         rookie_multiplier = 1
                     rating_penalty = 0
                     if penalty and len(driver.ratings) >= rookie_rating_count_scaled:
-                        rating_penalty = driver_rating*PENALTY_FACTOR
+                        rating_penalty = driver_rating*params.penalty_factor
 
-                    diff_team_multiplier_growth = exp(-DIFF_TEAM_GROWTH_WEIGHT * diff_team_performance / BASE_TEAM_RATING)
-                    diff_team_multiplier_dumper = exp(DIFF_TEAM_DUMPER_WEIGHT * diff_team_performance / BASE_TEAM_RATING)
+                    diff_team_multiplier_growth = exp(-params.diff_team_growth_weight * diff_team_performance / params.base_team_rating)
+                    diff_team_multiplier_dumper = exp(params.diff_team_dumper_weight * diff_team_performance / params.base_team_rating)
 
-                    if diff_team_multiplier_growth < DIFF_TEAM_GROWTH_WEIGHT_MIN:
-                        diff_team_multiplier_growth = DIFF_TEAM_GROWTH_WEIGHT_MIN
-                    if diff_team_multiplier_dumper < DIFF_TEAM_DUMPER_WEIGHT_MIN:
-                        diff_team_multiplier_dumper = DIFF_TEAM_DUMPER_WEIGHT_MIN
+                    if diff_team_multiplier_growth < params.diff_team_growth_weight_min:
+                        diff_team_multiplier_growth = params.diff_team_growth_weight_min
+                    if diff_team_multiplier_dumper < params.diff_team_dumper_weight_min:
+                        diff_team_multiplier_dumper = params.diff_team_dumper_weight_min
 
-                    if diff_team_multiplier_growth > DIFF_TEAM_GROWTH_WEIGHT_MAX:
-                        diff_team_multiplier_growth = DIFF_TEAM_GROWTH_WEIGHT_MAX
-                    if diff_team_multiplier_dumper > DIFF_TEAM_DUMPER_WEIGHT_MAX:
-                        diff_team_multiplier_dumper = DIFF_TEAM_DUMPER_WEIGHT_MAX
+                    if diff_team_multiplier_growth > params.diff_team_growth_weight_max:
+                        diff_team_multiplier_growth = params.diff_team_growth_weight_max
+                    if diff_team_multiplier_dumper > params.diff_team_dumper_weight_max:
+                        diff_team_multiplier_dumper = params.diff_team_dumper_weight_max
 
                     if race_bonus < 0:
                         race_bonus /= diff_team_multiplier_dumper
@@ -194,69 +143,65 @@ def compute_ratings(seasons, drivers, teams, qualis, sprints, statuses):
                         decay = 0
 
                     rating_change = (
-                                    + diff_teammates*DIFF_TEAMMATES * rookie_multiplier_diff_teammates
-                                    + race_bonus*RACE_BONUS * rookie_multiplier_race * num_races_weight_scaled
-                                    + quali_bonus*QUALI_BONUS * rookie_multiplier_quali * num_races_weight_scaled
-                                    + sprint_bonus*SPRINT_BONUS * rookie_multiplier_sprint
-                                    + diff_race*DIFF_RACE * rookie_multiplier_diff_race
-                                    + diff_sprint*DIFF_SPRINT * rookie_multiplier_diff_sprint
-                                ) * SWING_MULTIPLIER - rating_penalty
+                                    + diff_teammates*params.diff_teammates * rookie_multiplier_diff_teammates
+                                    + race_bonus*params.race_bonus * rookie_multiplier_race * num_races_weight_scaled
+                                    + quali_bonus*params.quali_bonus * rookie_multiplier_quali * num_races_weight_scaled
+                                    + sprint_bonus*params.sprint_bonus * rookie_multiplier_sprint
+                                    + diff_race*params.diff_race * rookie_multiplier_diff_race
+                                    + diff_sprint*params.diff_sprint * rookie_multiplier_diff_sprint
+                                ) * params.swing_multiplier - rating_penalty
                     new_driver_rating = driver_rating + rating_change - decay
 
                     driver.ratings.append((new_driver_rating, race.date))
 
+            teams_started = time.perf_counter()
+            record("compute.drivers", teams_started - drivers_started)
             teams_weighted_pos = []
-            team_decays = compute_teams_rating_decay(teams, TEAM_RATING_DECAY_NUM_RACES, num_races_weight)
-            for team_id, team_positions_race in teams_positions_races.items():
-                team = next((t for t in teams if t.id == team_id), None)
+            teams_positions_qualis = prep.team_quali_positions
+            teams_positions_sprints = prep.team_sprint_positions
+            for team_id, team_positions_race in prep.team_race_positions.items():
+                team = teams_by_id.get(team_id)
                 if team:
                     race_avg = 0
                     for position in team_positions_race:
-                        driver_rating = get_driver_by_id(drivers, position[0]).ratings[-1][0]
-                        driver_rating_deviation = driver_rating - BASE_DRIVER_RATING
-                        driver_rating_deviation *= DRIVER_RATING_DEVIATION_MULTIPLIER
-                        scaling_factor = (BASE_DRIVER_RATING + driver_rating_deviation) / BASE_DRIVER_RATING
+                        driver_rating = drivers_by_id[position[0]].ratings.current
+                        driver_rating_deviation = driver_rating - params.base_driver_rating
+                        driver_rating_deviation *= params.driver_rating_deviation_multiplier
+                        scaling_factor = (params.base_driver_rating + driver_rating_deviation) / params.base_driver_rating
                         race_avg += position[1] * scaling_factor
                     if len(team_positions_race) != 0:
                         race_avg /= len(team_positions_race)
                     quali_avg = 0
                     if team_id in teams_positions_qualis:
                         for position in teams_positions_qualis[team_id]:
-                            driver_rating = get_driver_by_id(drivers, position[0]).ratings[-1][0]
-                            driver_rating_deviation = driver_rating - BASE_DRIVER_RATING
-                            driver_rating_deviation *= DRIVER_RATING_DEVIATION_MULTIPLIER
-                            scaling_factor = (BASE_DRIVER_RATING + driver_rating_deviation) / BASE_DRIVER_RATING
+                            driver_rating = drivers_by_id[position[0]].ratings.current
+                            driver_rating_deviation = driver_rating - params.base_driver_rating
+                            driver_rating_deviation *= params.driver_rating_deviation_multiplier
+                            scaling_factor = (params.base_driver_rating + driver_rating_deviation) / params.base_driver_rating
                             quali_avg += position[1] * scaling_factor
                         if len(teams_positions_qualis[team_id]) != 0:
                             quali_avg /= len(teams_positions_qualis[team_id])
                     sprint_avg = 0
                     if team_id in teams_positions_sprints:
                         for position in teams_positions_sprints[team_id]:
-                            driver_rating = get_driver_by_id(drivers, position[0]).ratings[-1][0]
-                            driver_rating_deviation = driver_rating - BASE_DRIVER_RATING
-                            driver_rating_deviation *= DRIVER_RATING_DEVIATION_MULTIPLIER
-                            scaling_factor = (BASE_DRIVER_RATING + driver_rating_deviation) / BASE_DRIVER_RATING
+                            driver_rating = drivers_by_id[position[0]].ratings.current
+                            driver_rating_deviation = driver_rating - params.base_driver_rating
+                            driver_rating_deviation *= params.driver_rating_deviation_multiplier
+                            scaling_factor = (params.base_driver_rating + driver_rating_deviation) / params.base_driver_rating
                             sprint_avg = position[1] * scaling_factor
                         if len(teams_positions_sprints[team_id]) != 0:
                             sprint_avg /= len(teams_positions_sprints[team_id])
                     team_weighted_pos = (
-                                      + race_avg*TEAM_RACE_WEIGHT*num_races_weight
-                                      + quali_avg*TEAM_QUALI_WEIGHT*num_races_weight
-                                      + sprint_avg*TEAM_SPRINT_WEIGHT
+                                      + race_avg*params.team_race_weight*num_races_weight
+                                      + quali_avg*params.team_quali_weight*num_races_weight
+                                      + sprint_avg*params.team_sprint_weight
                                   )
                     teams_weighted_pos.append((team.id, team_weighted_pos))
 
-            teams_copy = teams.copy()
-            for team_id, _ in teams_weighted_pos:
-                team = next((t for t in teams if t.id == team_id), None)
-                rating_change = compute_team_rating_change(teams_copy, team_id, teams_weighted_pos)
-                if team:
-                    team_rating = team.ratings[-1][0]
-                    if team.id in team_decays:
-                        decay = team_decays[team.id]
-                    else:
-                        decay = 0
-                    new_team_rating = team_rating + rating_change * SWING_MULTIPLIER_TEAM * num_races_weight_scaled - decay
-                    team.ratings.append((new_team_rating, race.date))
+            team_decays = compute_teams_rating_decay([teams_by_id[team_id] for team_id, _ in teams_weighted_pos],
+                                                     params.team_rating_decay_num_races, num_races_weight, params)
+            update_team_ratings(teams, teams_weighted_pos, team_decays, num_races_weight_scaled, race.date, params)
+            record("compute.teams", time.perf_counter() - teams_started)
+        record(f"compute.season.{season.year}", time.perf_counter() - season_started)
 
     return drivers, teams
@@ -1,58 +1,76 @@
 from .dataclasses import *
 from .config import *
 from .helpers import *
+from .profiling import timed
 
-def compute_teammate_place_diff(drivers, statuses, driver_id, team_id, position, status, results, lastPossiblePosition):
-    try:
-        position = int(position)
-    except ValueError:
-        if not is_driver_fault(status, statuses):
-            return 0
-        else:
+def group_teammates(results, statuses, lastPossiblePosition):
+    # for every result of a race, (teammate ids, place diffs to their results) or None when it has no teammate diff
+    # a shared drive lists a driver more than once, every result of a teammate counts
+    positions = []
+    team_drivers = {}
+    driver_rows = {}
+    for i, (driver_id, team_id, position, _) in enumerate(results):
+        try:
+            positions.append(int(position))
+        except (ValueError, TypeError):
+            positions.append(None)
+        team_drivers.setdefault(team_id, []).append(driver_id)
+        driver_rows.setdefault(driver_id, []).append(i)
+
+    groups = []
+    for i, (driver_id, team_id, _, status) in enumerate(results):
+        position = positions[i]
+        if position is None:
+            if not is_driver_fault(status, statuses):
+                groups.append(None)
+                continue
             position = lastPossiblePosition
+        teammate_ids = [teammate_id for teammate_id in team_drivers[team_id] if teammate_id != driver_id]
+        if not teammate_ids:
+            groups.append(None)
+            continue
+        rows = sorted(j for teammate_id in set(teammate_ids) for j in driver_rows[teammate_id])
+        diffs = [positions[j] - position if positions[j] is not None else 0 for j in rows]
+        groups.append((teammate_ids, diffs))
+    return groups
 
-    teammate_ids = [res[0] for res in results if res[1] == team_id and res[0] != driver_id]
-    if not teammate_ids:
+@timed("compute_teammate_place_diff")
+def compute_teammate_place_diff(drivers_by_id, driver_id, teammates, lastPossiblePosition):
+    # teammates is the driver's entry from group_teammates, ratings are read now as teammates may have raced already
+    if teammates is None:
         return 0
-    teammate_positions = [res[2] for res in results if res[0] in teammate_ids]
-    teammate_statuses = [res[3] for res in results if res[0] in teammate_ids]
-
-    diffs = []
-    for teammate_position in teammate_positions:
-        try:
-            teammate_position = int(teammate_position)
-            diffs.append(teammate_position - position)
-        except ValueError:
-            diffs.append(0)
+    teammate_ids, diffs = teammates
 
     expectedScores = [] # elo rating expected scores Ea = 1 / (1 + 10 ** ((teammate_rating - driver_rating) / 400))
     for teammate_id in teammate_ids:
-        teammate = next((d for d in drivers if d.id == teammate_id), None)
+        teammate = drivers_by_id.get(teammate_id)
         if teammate and teammate.ratings:
-            teammate_rating = teammate.ratings[-1][0]
-            driver_rating = next((d for d in drivers if d.id == driver_id), None).ratings[-1][0]
+            teammate_rating = teammate.ratings.current
+            driver_rating = drivers_by_id[driver_id].ratings.current
             expected_score = 1 / (1 + 10 ** ((teammate_rating - driver_rating) / 400))
             expectedScores.append(expected_score)
     if not expectedScores:
         return 0
 
+    table = half_distribution_table(lastPossiblePosition - 1, 5)
     diffs_distributed = []
     for diff in diffs:
         if diff < 0:
             sign = -1
         else:
             sign = 1
-        distributed_diff = -half_distribution_function(abs(diff), lastPossiblePosition - 1, 5) * sign
+        distributed_diff = -table_value(table, abs(diff), half_distribution_function, lastPossiblePosition - 1, 5) * sign
         diffs_distributed.append(distributed_diff)
 
     diffs_adjusted = [diff * 2 * expected_score for diff, expected_score in zip(diffs_distributed, expectedScores)]
 
     return sum(diffs_adjusted) / len(diffs_adjusted) if diffs_adjusted else 0
 
-def compute_drivers_rating_decay(drivers, decay_full_num_races, num_races_weight):
+@timed("compute_drivers_rating_decay")
+def compute_drivers_rating_decay(drivers, decay_full_num_races, num_races_weight, params=DEFAULT_PARAMETERS):
     decays = {}
     for driver in drivers:
-        diff = driver.ratings[-1][0] - BASE_DRIVER_RATING
+        diff = driver.ratings.current - params.base_driver_rating
         if diff == 0:
             continue
         decay = diff / (decay_full_num_races/num_races_weight)
@@ -1,47 +1,48 @@
 from .config import *
 from .dataclasses import *
+from .index import *
+from .profiling import timed
 
-def compute_team_rating_change(teams, team_id, teams_weighted_pos):
-    team_weighted_pos = next((pos for pos in teams_weighted_pos if pos[0] == team_id), None)
-    if not team_weighted_pos:
-        return 0
-    team_pos = team_weighted_pos[1]
-    best_pos = min(pos[1] for pos in teams_weighted_pos)
-    worst_pos = max(pos[1] for pos in teams_weighted_pos)
-    if best_pos == worst_pos:
-        return 0
+@timed("update_team_ratings")
+def update_team_ratings(teams, teams_weighted_pos, team_decays, num_races_weight_scaled, date, params=DEFAULT_PARAMETERS):
+    # new rating of every team in teams_weighted_pos, from the field's median, spread and average rating
+    # teams are updated one after another, so those updated earlier in the race count towards the average of later ones
+    positions = dict(teams_weighted_pos)
+    if not positions:
+        return
+    best_pos = min(positions.values())
+    worst_pos = max(positions.values())
+    visits = [team_id for team_id, _ in teams_weighted_pos]
+    if best_pos != worst_pos:
+        ranking = sorted(teams_weighted_pos, key=lambda x: x[1])
+        middle_pos = ranking[len(ranking)//2][1]
+        # teams used to be rated while walking teams_weighted_pos, which the first rating sorted in place:
+        # after the first team the visits follow the ranking, skipping the best team and maybe repeating one
+        visits = visits[:1] + [team_id for team_id, _ in ranking[1:]]
 
-    teams_weighted_pos.sort(key=lambda x: x[1])
-    middle_pos = teams_weighted_pos[len(teams_weighted_pos)//2][1]
-    raw_change = middle_pos - team_pos + len(teams_weighted_pos)
-    raw_change = raw_change / (worst_pos - best_pos)
+    field = [team for team in teams if team.id in positions]
+    rated = [team for team in field if team.ratings]
+    field_ratings = [team.ratings.current for team in rated] # in teams order, summed the same way every time
+    slots = {team.id: i for i, team in enumerate(rated)}
+    field_teams = {team.id: team for team in field}
+    for team_id in visits:
+        team = field_teams[team_id]
+        rating_change = 0
+        if best_pos != worst_pos and team.ratings:
+            raw_change = (middle_pos - positions[team_id] + len(teams_weighted_pos)) / (worst_pos - best_pos)
+            average_opponent_rating = sum(field_ratings) / len(field)
+            rating_change = raw_change * (1 / (1 + 10 ** ((average_opponent_rating - team.ratings.current) / 400)))
+        new_team_rating = team.ratings.current + rating_change * params.swing_multiplier_team * num_races_weight_scaled - team_decays.get(team_id, 0)
+        team.ratings.append((new_team_rating, date))
+        if team_id in slots:
+            field_ratings[slots[team_id]] = new_team_rating
 
-    team = next((t for t in teams if t.id == team_id), None)
-    if not team or not team.ratings:
-        return 0
-    team_rating = team.ratings[-1][0]
-
-    teams_filtered = [team for team in teams if team.id in [pos[0] for pos in teams_weighted_pos]]
-    total_rating = sum(t.ratings[-1][0] for t in teams_filtered if t.ratings)
-    num_teams = len(teams_filtered)
-    if num_teams == 0:
-        return 0
-    average_opponent_rating = total_rating / num_teams
-    rating_change = 1 / (1 + 10 ** ((average_opponent_rating - team_rating) / 400))
-    final_change = raw_change * rating_change
-
-    return final_change
-
-def rerate_teams(season, teams):
-    team_ids_in_season = set()
-    for race in season.races:
-        for result in race.results:
-            if result[1] not in team_ids_in_season:
-                team_ids_in_season.add(result[1])
+def rerate_teams(season, teams, participation, params=DEFAULT_PARAMETERS):
+    team_ids_in_season = participation.season_teams.get(season.year, set())
     teams_in_season = [team for team in teams if team.id in team_ids_in_season]
     if not teams_in_season:
         return teams
-    ratings = [team.ratings[-1][0] for team in teams_in_season if team.ratings]
+    ratings = [team.ratings.current for team in teams_in_season if team.ratings]
     if not ratings:
         return teams
     median_rating = sorted(ratings)[len(ratings) // 2]
@@ -49,39 +50,28 @@ def rerate_teams(season, teams):
         if team.id not in team_ids_in_season:
             continue
         if team.ratings:
-            team_rating = team.ratings[-1][0]
-            normalized_rating = (team_rating - median_rating) + BASE_TEAM_RATING
+            team_rating = team.ratings.current
+            normalized_rating = (team_rating - median_rating) + params.base_team_rating
             team.ratings.append((normalized_rating, None))  # Append new intermediate rating
         else:
-            team.ratings.append((BASE_TEAM_RATING, None))
+            team.ratings.append((params.base_team_rating, None))
 
     return teams
 
-def compute_teams_rating_decay(teams, decay_full_num_races, num_races_weight):
+@timed("compute_teams_rating_decay")
+def compute_teams_rating_decay(teams, decay_full_num_races, num_races_weight, params=DEFAULT_PARAMETERS):
     decays = {}
     for team in teams:
-        diff = team.ratings[-1][0] - BASE_TEAM_RATING
+        diff = team.ratings.current - params.base_team_rating
         if diff == 0:
             continue
         decay = diff / (decay_full_num_races/num_races_weight)
         decays[team.id] = decay
     return decays
 
-def reset_team_reentry_ratings(seasons, season, teams):
-    prev_year = season.year - 1
-    prev_season = next((s for s in seasons if s.year == prev_year), None)
-    if not prev_season:
-        return teams
-
-    current_season_team_ids = set()
-    for race in season.races:
-        for result in race.results:
-            current_season_team_ids.add(result[1])
-    previous_season_team_ids = set()
-    for race in prev_season.races:
-        for result in race.results:
-            previous_season_team_ids.add(result[1])
+def reset_team_reentry_ratings(season, teams, participation, params=DEFAULT_PARAMETERS):
+    reentry_ids = set(reentry_team_ids(participation, season.year))
     for team in teams:
-        if team.id in current_season_team_ids and team.id not in previous_season_team_ids:
-            team.ratings.append((BASE_TEAM_RATING, None))
+        if team.id in reentry_ids:
+            team.ratings.append((params.base_team_rating, None))
     return teams
@@ -1,5 +1,9 @@
+import os
+from dataclasses import dataclass
+
 # Dataset
 KAGGLE_PATH = "jtrotman/formula-1-race-data"
+# every table in the dataset, fetch_data loads only the ones the get_* functions read
 FILES = ["constructor_results.csv",
          "constructor_standings.csv",
          "constructors.csv",
@@ -10,12 +14,36 @@ FILES = ["constructor_results.csv",
          "results.csv",
          "sprint_results.csv",
          "status.csv"]
+DATASET_DIR = None # local directory with the CSVs above, None downloads them from Kaggle
+# parsed tables keyed by CSV content hash, shared by every dataset directory, None disables caching
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "f1ratings")
+FETCH_THREADS = 4
+FETCH_LOADER = "csv" # local directories are read with the csv module ("csv") or with pandas ("pandas"), Kaggle always uses pandas; both use CACHE_DIR
 
 
 # Plots
 PLOT_COLORMAP = "nipy_spectral"
 PLOT_LINEWIDTH = 0.5
 PLOT_MARKERSIZE = 2
+PLOT_DPI = 300
+PLOT_PROCESSES = None # worker processes for batch plot export, None uses every CPU
+PLOT_DOWNSAMPLE = "lttb" # "lttb", "minmax" or None to plot every rating
+PLOT_BULK_THRESHOLD = 40 # plots of more drivers/teams are drawn as a single LineCollection without a legend
+
+# Progress and profiling
+VERBOSITY = 1 # 0 silent, 1 steps and seasons, 2 also every table and race
+PROFILE_REPORT = None # JSON report written after a profiled run, None only prints the summary
+PROFILE_CPROFILE = False # add the slowest functions from cProfile to the report
+PROFILE_TRACEMALLOC = False # add peak memory and the largest allocations from tracemalloc to the report
+PROFILE_TOP = 15 # stages, functions and allocations listed
+
+# Parameter Sweeps
+SWEEP_PROCESSES = None # worker processes for parameter sweeps, None uses every CPU
+
+# Calibration
+CALIBRATION_GENERATIONS = 40
+CALIBRATION_POPULATION = None # candidates per generation, None uses the number of worker processes (at least 4)
+CALIBRATION_CHECKPOINT_SEASONS = 10 # candidates that can no longer win are stopped every this many seasons
 
 #Current Season
 CURRENT_SEASON_LENGTH = 24
@@ -69,3 +97,45 @@ DRIVER_RATING_DECAY_NUM_RACES = 100
 # Number of Races Influence
 NUM_RACES_INFLUENCE_TREND = 1.2
 NUM_RACES_INFLUENCE_STEEPNESS = 0.1
+
+# Rating Parameters
+# the rating constants above as one object, so several parameter sets can be computed in one process
+# compute functions take a Parameters, DEFAULT_PARAMETERS is what the constants above give
+@dataclass(frozen=True)
+class Parameters:
+    current_season_length: int = CURRENT_SEASON_LENGTH
+    base_driver_rating: float = BASE_DRIVER_RATING
+    base_team_rating: float = BASE_TEAM_RATING
+    penalty_factor: float = PENALTY_FACTOR
+    diff_teammates: float = DIFF_TEAMMATES
+    race_bonus: float = RACE_BONUS
+    quali_bonus: float = QUALI_BONUS
+    sprint_bonus: float = SPRINT_BONUS
+    diff_race: float = DIFF_RACE
+    diff_sprint: float = DIFF_SPRINT
+    rookie_rating_count: int = ROOKIE_RATING_COUNT
+    rookie_modifier: float = ROOKIE_MODIFIER
+    diff_team_growth_weight_min: float = DIFF_TEAM_GROWTH_WEIGHT_MIN
+    diff_team_growth_weight_max: float = DIFF_TEAM_GROWTH_WEIGHT_MAX
+    diff_team_dumper_weight_min: float = DIFF_TEAM_DUMPER_WEIGHT_MIN
+    diff_team_dumper_weight_max: float = DIFF_TEAM_DUMPER_WEIGHT_MAX
+    diff_team_growth_weight: float = DIFF_TEAM_GROWTH_WEIGHT
+    diff_team_dumper_weight: float = DIFF_TEAM_DUMPER_WEIGHT
+    team_race_weight: float = TEAM_RACE_WEIGHT
+    team_quali_weight: float = TEAM_QUALI_WEIGHT
+    team_sprint_weight: float = TEAM_SPRINT_WEIGHT
+    driver_rating_deviation_multiplier: float = DRIVER_RATING_DEVIATION_MULTIPLIER
+    swing_multiplier: float = SWING_MULTIPLIER
+    swing_multiplier_team: float = SWING_MULTIPLIER_TEAM
+    reset_team_ratings_season: bool = RESET_TEAM_RATINGS_SEASON
+    rerate_team_ratings_season: bool = RERATE_TEAM_RATINGS_SEASON
+    reset_team_reentry_ratings: bool = RESET_TEAM_REENTRY_RATINGS
+    team_rating_decay_num_races: float = TEAM_RATING_DECAY_NUM_RACES
+    driver_rating_decay_num_races: float = DRIVER_RATING_DECAY_NUM_RACES
+    num_races_influence_trend: float = NUM_RACES_INFLUENCE_TREND
+    num_races_influence_steepness: float = NUM_RACES_INFLUENCE_STEEPNESS
+    def __str__(self):
+        changed = [f"{name}={value}" for name, value in vars(self).items() if value != getattr(Parameters, name)]
+        return f"Parameters({', '.join(changed) if changed else 'defaults'})"
+
+DEFAULT_PARAMETERS = Parameters()
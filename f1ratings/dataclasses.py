@@ -1,20 +1,25 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
+from .history import RatingHistory
+
 @dataclass
 class Driver:
     id: int
     forename: str
     surname: str
-    ratings: list # (rating, date)
+    ratings: RatingHistory # (rating, date)
     first_race_date: datetime.date = None
     last_race_date: datetime.date = None
+    def __post_init__(self):
+        if isinstance(self.ratings, list):
+            self.ratings = RatingHistory(self.ratings)
     def __str__(self):
         if self.ratings is None:
             return f"{self.forename} {self.surname} (ID: {self.id}) | Rating: N/A"
-        return  f"{(self.forename + " " + self.surname):<40} | {round(self.ratings[-1][0]):>5} " \
-                f"Peak: {round(max(self.ratings, key=lambda y: y[0])[0]):>5} " \
-                f"{max(self.ratings, key=lambda y: y[0])[1] if max(self.ratings, key=lambda y: y[0])[1] else 'N/A'}"
+        return  f"{(self.forename + " " + self.surname):<40} | {round(self.ratings.current):>5} " \
+                f"Peak: {round(self.ratings.peak_value):>5} " \
+                f"{self.ratings.peak[1] if self.ratings.peak[1] else 'N/A'}"
     def __hash__(self):
         return hash(self.id)
 
@@ -22,15 +27,18 @@ class Driver:
 class Team:
     id: int
     name: str
-    ratings: list # (rating, date)
+    ratings: RatingHistory # (rating, date)
     first_race_date: datetime.date = None
     last_race_date: datetime.date = None
+    def __post_init__(self):
+        if isinstance(self.ratings, list):
+            self.ratings = RatingHistory(self.ratings)
     def __str__(self):
         if self.ratings is None:
             return f"{self.name} (ID: {self.id}) | Rating: N/A"
-        return  f"{self.name:<40} | {round(self.ratings[-1][0]):>5} " \
-                f"Peak: {round(max(self.ratings, key=lambda y: y[0])[0]):>5} " \
-                f"{max(self.ratings, key=lambda y: y[0])[1] if max(self.ratings, key=lambda y: y[0])[1] else 'N/A'}"
+        return  f"{self.name:<40} | {round(self.ratings.current):>5} " \
+                f"Peak: {round(self.ratings.peak_value):>5} " \
+                f"{self.ratings.peak[1] if self.ratings.peak[1] else 'N/A'}"
     def __hash__(self):
         return hash(self.id)
 
@@ -61,7 +69,7 @@ class Sprint:
     starting_positions: list # (driver_id, starting_position)
     total_time: float = None
     def __str__(self):
-        sorted_results = sorted(self.results, key=lambda x: x[2])
+        sorted_results = sorted(self.results, key=lambda x: (x[2] is None, x[2] or 0))
         return f"Sprint to race ID: {self.race_id} | Winner driver ID: {sorted_results[0][0]}"
 
 @dataclass
@@ -70,3 +78,100 @@ class Season:
     races: list # sorted by date
     def __str__(self):
         return f"Season: {self.year} with {len(self.races)} races"
+
+@dataclass
+class RaceEntry:
+    result: tuple # (driver_id, team_id, position, additional_info)
+    starting_position: tuple = None # (driver_id, starting_position)
+    quali_result: tuple = None # (driver_id, team_id, position)
+    sprint_result: tuple = None # (driver_id, team_id, position, additional_info)
+    sprint_starting_position: tuple = None # (driver_id, starting_position)
+
+@dataclass
+class RaceWeekend:
+    race: Race
+    quali: Qualifying
+    sprint: Sprint
+    entries: dict # driver_id -> RaceEntry
+    def __str__(self):
+        return f"{self.race} | Qualifying: {self.quali is not None} | Sprint: {self.sprint is not None}"
+
+@dataclass
+class RaceFeatures:
+    # what compute_ratings reads from a race that depends neither on ratings nor on parameters
+    # per result, in results order: the weekend bonuses before season weighting and the teammate groups
+    teammates: list # group_teammates entries
+    penalty: list # bool, retired by the driver's fault
+    race_bonus: object # float64 array
+    quali_bonus: object # float64 array
+    sprint_bonus: object # float64 array
+    diff_race: object # float64 array, places gained from the grid, distributed and signed
+    diff_sprint: object # float64 array
+    # per team, in order of first result: [(driver_id, position)] with unclassified positions as the field size
+    team_race_positions: dict
+    team_quali_positions: dict
+    team_sprint_positions: dict
+    def __str__(self):
+        return f"Features of {len(self.penalty)} results from {len(self.team_race_positions)} teams"
+
+@dataclass
+class Checkpoint:
+    season: int # year of the last season computed
+    season_races: int # races of that season already computed
+    season_team_ids: list # teams racing in that season so far
+    reentry_team_ids: list # teams reset to the base rating at the start of that season
+    team_ids: list
+    season_weights: dict # year -> num_races_weight used
+    history_digest: str # computed race weekends
+    config_digest: str # parameters
+    def __str__(self):
+        return f"Checkpoint after race {self.season_races} of {self.season}"
+
+@dataclass
+class RatingTable:
+    params: object # Parameters the ratings were computed with
+    driver_ids: object # int64 array
+    driver_ratings: object # float64 array, current rating per driver
+    driver_peaks: object # float64 array, peak rating per driver
+    team_ids: object # int64 array
+    team_ratings: object # float64 array, current rating per team
+    team_peaks: object # float64 array, peak rating per team
+    def __str__(self):
+        return f"Ratings for {self.params} | {len(self.driver_ids)} drivers, {len(self.team_ids)} teams"
+
+@dataclass
+class Constraint:
+    entity: str # "driver" or "team"
+    name: str # full driver name or team name
+    stat: str = "peak" # "peak" or "rating" (current rating)
+    low: float = None # stat at least low
+    high: float = None # stat at most high
+    above: str = None # name of a driver/team whose stat must be lower
+    def __str__(self):
+        bounds = []
+        if self.low is not None:
+            bounds.append(f">= {self.low}")
+        if self.high is not None:
+            bounds.append(f"<= {self.high}")
+        if self.above is not None:
+            bounds.append(f"above {self.above}")
+        return f"{self.entity} {self.name} {self.stat} {' and '.join(bounds)}"
+
+@dataclass
+class Participation:
+    season_drivers: dict # year -> set of driver ids that raced in the season, for every season (also empty ones)
+    season_teams: dict # year -> set of team ids that raced in the season
+    driver_seasons: dict # driver id -> years raced, ascending
+    team_seasons: dict # team id -> years raced, ascending
+    driver_race_dates: dict # driver id -> (first race date, last race date)
+    team_race_dates: dict # team id -> (first race date, last race date)
+    grid: tuple # (driver ids, team ids) of the last race with results
+
+@dataclass
+class PlotJob:
+    kind: str # "driver", "drivers", "team", "teams", "team_and_driver", "teams_and_drivers" or "grid"
+    path: str # .png or .svg file, a "grid" job writes <path>_drivers and <path>_teams
+    drivers: list = field(default_factory=list) # Driver objects or driver names
+    teams: list = field(default_factory=list) # Team objects or team names
+    startdate: datetime.date = None # None for the first race
+    enddate: datetime.date = None # None for today
@@ -0,0 +1,98 @@
+import os
+from datetime import date
+
+import matplotlib as mpl
+
+from .config import *
+from .dataclasses import *
+from .plots import *
+from .profiling import report
+from .pool import map_tasks, worker_state
+
+# Renders many plots at once: every job is drawn on its own headless Agg figure in a worker process,
+# so nothing goes through pyplot and the files are written in parallel.
+# Workers only receive the drivers and teams the jobs plot, along with the line style of the caller.
+
+PLOT_KINDS = {
+    # kind: (drivers, teams) it plots, 1 for exactly one and None for one or more
+    "driver": (1, 0),
+    "drivers": (None, 0),
+    "team": (0, 1),
+    "teams": (0, None),
+    "team_and_driver": (1, 1),
+    "teams_and_drivers": (None, None),
+    "grid": (0, 0)
+}
+
+def _check_count(job, count, expected, entity):
+    if expected == 0 and count:
+        raise ValueError(f"A '{job.kind}' plot takes no {entity}s.")
+    if expected == 1 and count != 1:
+        raise ValueError(f"A '{job.kind}' plot takes exactly one {entity}.")
+    if expected is None and not count:
+        raise ValueError(f"A '{job.kind}' plot takes at least one {entity}.")
+
+def check_job(job):
+    if job.kind not in PLOT_KINDS:
+        raise ValueError(f"Unknown plot kind '{job.kind}'.")
+    expected_drivers, expected_teams = PLOT_KINDS[job.kind]
+    _check_count(job, len(job.drivers), expected_drivers, "driver")
+    _check_count(job, len(job.teams), expected_teams, "team")
+    if os.path.splitext(job.path)[1].lower() not in (".png", ".svg"):
+        raise ValueError(f"Plot path '{job.path}' must end in .png or .svg.")
+
+def _plot(kind, drivers, teams, startdate, enddate, figure, downsample):
+    if kind == "driver":
+        return plot_driver_rating(drivers[0], startdate, enddate, figure, downsample)
+    if kind == "drivers":
+        return plot_drivers_rating(drivers, startdate, enddate, figure, downsample)
+    if kind == "team":
+        return plot_team_rating(teams[0], startdate, enddate, figure, downsample)
+    if kind == "teams":
+        return plot_teams_rating(teams, startdate, enddate, figure, downsample)
+    if kind == "team_and_driver":
+        return plot_team_and_driver_rating(teams[0], drivers[0], startdate, enddate, figure, downsample)
+    return plot_teams_and_drivers(teams, drivers, startdate, enddate, figure, downsample)
+
+def _render(task):
+    # path written, or None when there is nothing to plot between the dates
+    kind, driver_ids, team_ids, path, startdate, enddate, downsample = task
+    drivers_by_id, teams_by_id, style = worker_state()[0]
+    with mpl.rc_context(style):
+        figure = _plot(kind, [drivers_by_id[i] for i in driver_ids], [teams_by_id[i] for i in team_ids],
+                       startdate, enddate, new_figure(), downsample)
+        if figure is None:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        figure.savefig(path, dpi=PLOT_DPI)
+    return path
+
+def export_plots(jobs, grid, style=None, processes=PLOT_PROCESSES, downsample=PLOT_DOWNSAMPLE):
+    # jobs hold Driver/Team objects, grid is (grid drivers, grid teams) for "grid" jobs
+    # returns the paths written, jobs without data between their dates are skipped
+    tasks = []
+    needed_drivers, needed_teams = {}, {}
+    for job in jobs:
+        check_job(job)
+        startdate = job.startdate or date(1950, 1, 1)
+        enddate = job.enddate or date.today()
+        if job.kind == "grid":
+            stem, extension = os.path.splitext(job.path)
+            parts = [("drivers", grid[0], [], f"{stem}_drivers{extension}"),
+                     ("teams", [], grid[1], f"{stem}_teams{extension}")]
+        else:
+            parts = [(job.kind, job.drivers, job.teams, job.path)]
+        for kind, job_drivers, job_teams, path in parts:
+            needed_drivers.update((driver.id, driver) for driver in job_drivers)
+            needed_teams.update((team.id, team) for team in job_teams)
+            tasks.append((kind, [driver.id for driver in job_drivers], [team.id for team in job_teams],
+                          path, startdate, enddate, downsample))
+
+    report(1, f"Exporting {len(tasks)} plots...")
+    results = map_tasks(_render, tasks, (needed_drivers, needed_teams, style or {}), processes)
+    paths = [path for path in results if path is not None]
+    if len(paths) < len(tasks):
+        report(1, f"\tSkipped {len(tasks) - len(paths)} plots with no data")
+    return paths
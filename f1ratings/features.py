@@ -0,0 +1,83 @@
+from array import array
+
+from .dataclasses import *
+from .helpers import *
+from .compute_driver import group_teammates
+from .index import build_race_weekends
+
+# Rating-independent inputs of compute_ratings, extracted for every race before the sequential rating pass,
+# which is then left with the season weighting and the arithmetic on ratings.
+# Features depend on neither ratings nor Parameters, so sweeps and calibration extract them once for all runs.
+
+def _position(value, default):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+def _signed_distribution(diff, table, a):
+    sign = 1
+    if diff < 0:
+        sign = -1
+    return table_value(table, abs(diff), distribution_function, a, 5) * sign
+
+def race_features(weekend, statuses):
+    results = weekend.race.results
+    numDrivers = len(results)
+    bonus_table = distribution_table(numDrivers, 5)
+    diff_table = distribution_table(numDrivers - 1, 5)
+    features = RaceFeatures(
+        teammates=group_teammates(results, statuses, numDrivers),
+        penalty=[],
+        race_bonus=array('d'),
+        quali_bonus=array('d'),
+        sprint_bonus=array('d'),
+        diff_race=array('d'),
+        diff_sprint=array('d'),
+        team_race_positions={},
+        team_quali_positions={},
+        team_sprint_positions={}
+    )
+    for driver_result in results:
+        features.penalty.append(driver_result[3] is not None and is_driver_fault(driver_result[3], statuses))
+
+        entry = weekend.entries[driver_result[0]]
+        race_starting_pos = entry.starting_position
+        quali_result = entry.quali_result
+        sprint_result = entry.sprint_result
+        sprint_starting_pos = entry.sprint_starting_position
+
+        features.race_bonus.append(table_value(bonus_table, driver_result[2], distribution_function, numDrivers, 5))
+        features.quali_bonus.append(table_value(bonus_table, quali_result[2], distribution_function, numDrivers, 5) if quali_result else 0)
+        features.sprint_bonus.append(table_value(bonus_table, sprint_result[2], distribution_function, numDrivers, 5) if sprint_result else 0)
+
+        try:
+            diff_race = race_starting_pos[1] - int(driver_result[2]) if race_starting_pos else 0
+        except (ValueError, TypeError):
+            diff_race = 0
+        try:
+            diff_sprint = sprint_starting_pos[1] - int(sprint_result[2]) if sprint_starting_pos else 0
+        except (ValueError, TypeError):
+            diff_sprint = 0
+        features.diff_race.append(_signed_distribution(diff_race, diff_table, numDrivers - 1))
+        features.diff_sprint.append(_signed_distribution(diff_sprint, diff_table, numDrivers - 1))
+
+        team_id = driver_result[1]
+        features.team_race_positions.setdefault(team_id, []).append((driver_result[0], _position(driver_result[2], numDrivers)))
+        quali_positions = features.team_quali_positions.setdefault(team_id, [])
+        if quali_result:
+            quali_positions.append((driver_result[0], _position(quali_result[2], numDrivers)))
+        sprint_positions = features.team_sprint_positions.setdefault(team_id, [])
+        if sprint_result:
+            sprint_positions.append((driver_result[0], _position(sprint_result[2], numDrivers)))
+    return features
+
+def build_features(races, weekends, statuses):
+    # race id -> RaceFeatures
+    return {race.id: race_features(weekends[race.id], statuses) for race in races}
+
+def dataset_features(dataset):
+    # features of every race of a (seasons, drivers, teams, qualis, sprints, statuses) dataset
+    seasons, _, _, qualis, sprints, statuses = dataset
+    races = [race for season in seasons for race in season.races]
+    return build_features(races, build_race_weekends(races, qualis, sprints), statuses)
@@ -1,210 +1,209 @@
 import kagglehub
-from kagglehub import KaggleDatasetAdapter
+import numpy as np
+import pandas as pd
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from .dataclasses import *
 from .config import *
-
-def fetch_data():
-    print("Fetching data from Kaggle dataset...")
+from .profiling import report, record
+from .fetch_csv import reads, required_tables, compile_seasons
+from .table_cache import open_table_cache
+
+def fetch_table(table, source, cache_dir=CACHE_DIR):
+    start = time.perf_counter()
+    if source is None:
+        path = kagglehub.dataset_download(KAGGLE_PATH, path=f"{table}.csv")
+    else:
+        path = os.path.join(source, f"{table}.csv")
+    data = load_table(path, cache_dir)
+    return data, time.perf_counter() - start
+
+def fetch_data(source=DATASET_DIR, tables=None, cache_dir=CACHE_DIR):
+    if tables is None:
+        tables = required_tables(*CONSUMERS)
+    if source is None:
+        report(1, "Fetching data from Kaggle dataset...")
+    else:
+        report(1, f"Loading data from {source}...")
+    with ThreadPoolExecutor(max_workers=FETCH_THREADS) as pool:
+        futures = {table: pool.submit(fetch_table, table, source, cache_dir) for table in tables}
     data = {}
-    for file in FILES:
-        file_name = file.split('.')[0]
-        data[file_name] = kagglehub.dataset_load(
-            KaggleDatasetAdapter.PANDAS,
-            KAGGLE_PATH,
-            file
-        )
+    for table, future in futures.items():
+        data[table], seconds = future.result()
+        record(f"fetch.{table}", seconds)
+        report(2, f"\tLoaded {table} ({len(data[table])} rows) in {seconds:.2f}s")
     return data
 
+# fields pd.read_csv reads as NaN by default
+NA_VALUES = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A",
+             "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+BOOL_VALUES = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+
+def load_table(path, cache_dir=CACHE_DIR):
+    # parsed tables are cached by table_cache.py, keyed by the CSV content hash, and mapped back
+    if cache_dir is None:
+        return pd.read_csv(path)
+    try:
+        table = open_table_cache(path, cache_dir)
+    except OSError as e:
+        print(f"Error caching {os.path.basename(path).split('.')[0]}: {e}")
+        return pd.read_csv(path)
+    return read_cached_table(table)
+
+def string_column(values):
+    # a column of CSV fields typed the way pd.read_csv types it: numbers, booleans or strings with NaN for NA fields
+    values = np.array(values, dtype=object)
+    na = np.fromiter((value in NA_VALUES for value in values), dtype=bool, count=len(values))
+    values[na] = np.nan
+    column = pd.Series(values, dtype=object)
+    if not len(values):
+        return column
+    present = set(values[~na])
+    if present and present <= BOOL_VALUES.keys() and not na.any():
+        return column.map(BOOL_VALUES).astype(bool)
+    try:
+        return pd.to_numeric(column)
+    except (ValueError, TypeError):
+        return column.infer_objects()
+
+def read_cached_table(table):
+    # DataFrame of a CachedTable, the numeric columns without empty fields are views of the mapped file
+    columns = {}
+    for name in table.columns:
+        kind = table.kind(name)
+        if kind == "str":
+            columns[name] = string_column(table.strings(name))
+            continue
+        values = np.frombuffer(table.block(name, 0), dtype='<i8' if kind == "int" else '<f8')
+        if table.has_nulls(name):
+            values = np.where(np.frombuffer(table.block(name, 1), dtype=bool), np.nan, values)
+        columns[name] = values
+    return pd.DataFrame(columns, copy=False)
+
+NULL = '\\N'
+
+def optional_ints(column):
+    # '\N' and anything else non numeric becomes None, numbers become Python ints
+    values = pd.to_numeric(column, errors='coerce').tolist()
+    return [None if value != value else int(value) for value in values]
+
+def time_seconds(column):
+    # race/sprint times like "1:34:50.616" or "34:50.616" in seconds, NaN for gaps ("+5.478"), laps and '\N'
+    times = column.astype(str)
+    valid = column.notna() & (times != NULL) & times.str.contains(':', regex=False) \
+            & ~times.str.contains('-', regex=False) & ~times.str.contains('+', regex=False)
+    parts = times.where(valid).str.split(':', expand=True)
+    if parts.shape[1] < 2:
+        return pd.Series(float('nan'), index=column.index)
+    parts = parts.apply(pd.to_numeric, errors='coerce')
+    if parts.shape[1] >= 3:
+        three = parts[2].notna()
+        hours = parts[0].where(three, 0)
+        minutes = parts[1].where(three, parts[0])
+        seconds = parts[2].where(three, parts[1])
+    else:
+        hours, minutes, seconds = 0, parts[0], parts[1]
+    return (hours * 3600 + minutes * 60 + seconds).where(valid)
+
+@reads("drivers")
 def get_drivers(data):
     drivers = data["drivers"]
-    driver_list = []
-    for _, row in drivers.iterrows():
-        driver = Driver(
-            id=row['driverId'],
-            forename=row['forename'],
-            surname=row['surname'],
-            ratings=[]
-        )
-        driver_list.append(driver)
-    return driver_list
+    return [Driver(id=driver_id, forename=forename, surname=surname, ratings=[])
+            for driver_id, forename, surname in zip(drivers['driverId'].tolist(),
+                                                    drivers['forename'].tolist(),
+                                                    drivers['surname'].tolist())]
 
+@reads("constructors")
 def get_teams(data):
     teams = data["constructors"]
-    team_list = []
-    for _, row in teams.iterrows():
-        team = Team(
-            id=row['constructorId'],
-            name=row['name'],
-            ratings=[]
-        )
-        team_list.append(team)
-    return team_list
+    return [Team(id=team_id, name=name, ratings=[])
+            for team_id, name in zip(teams['constructorId'].tolist(), teams['name'].tolist())]
 
+@reads("races", "results")
 def get_races(data):
     races = data["races"]
     results = data["results"]
 
+    dates = pd.to_datetime(races['date'], format='%Y-%m-%d').dt.date.tolist()
     races_dict = {}
-    for _, row in races.iterrows():
-        race = Race(
-            id=row['raceId'],
-            name=row['name'],
-            date=datetime.strptime(row['date'], '%Y-%m-%d').date(),
-            circuit_id=row['circuitId'],
+    for race_id, name, date, circuit_id in zip(races['raceId'].tolist(), races['name'].tolist(),
+                                               dates, races['circuitId'].tolist()):
+        races_dict[race_id] = Race(
+            id=race_id,
+            name=name,
+            date=date,
+            circuit_id=circuit_id,
             results=[],
             starting_positions=[],
         )
-        races_dict[race.id] = race
-
-    for _, row in results.iterrows():
-        race_id = row['raceId']
-        driver_id = row['driverId']
-        constructor_id = row['constructorId']
-        position = row['position']
-        additional_info = row['statusId']
-        starting_position = row['grid']
-        time = row['time']
-
-        if time and time != '\\N' and '-' not in time and '+' not in time and ':' in time:
-            time_parts = time.split(':')
-            if len(time_parts) == 3:
-                time_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + float(time_parts[2])
-            elif len(time_parts) == 2:
-                time_seconds = int(time_parts[0]) * 60 + float(time_parts[1])
-            else:
-                time_seconds = float(time_parts[0])
-            races_dict[race_id].total_time = time_seconds
-
-        races_dict[race_id].results.append((driver_id, constructor_id, position, additional_info))
-        races_dict[race_id].starting_positions.append((driver_id, starting_position))
-
-    races_list = []
-    for _, race in races_dict.items():
-        if race.date > datetime.now().date():
-            continue
-        races_list.append(race)
 
+    driver_ids = results['driverId'].tolist()
+    result_rows = list(zip(driver_ids, results['constructorId'].tolist(),
+                           optional_ints(results['position']), results['statusId'].tolist()))
+    starting_rows = list(zip(driver_ids, results['grid'].tolist()))
+    for race_id, rows in results.groupby('raceId', sort=False).indices.items():
+        race = races_dict[race_id]
+        race.results = [result_rows[i] for i in rows]
+        race.starting_positions = [starting_rows[i] for i in rows]
+
+    times = time_seconds(results['time'])
+    for race_id, time in times.groupby(results['raceId']).last().dropna().items():
+        races_dict[race_id].total_time = time
+
+    today = datetime.now().date()
+    races_list = [race for race in races_dict.values() if race.date <= today]
     races_list.sort(key=lambda x: x.date)
 
     return races_list
 
+@reads("qualifying")
 def get_qualis(data):
     qualis = data['qualifying']
 
-    results = []
-    for _, row in qualis.iterrows():
-        results.append((
-            row['raceId'],
-            row['driverId'],
-            row['constructorId'],
-            row['position']
-        ))
-
+    result_rows = list(zip(qualis['driverId'].tolist(), qualis['constructorId'].tolist(),
+                           optional_ints(qualis['position'])))
     quali_list = []
-    results.sort(key=lambda x: x[0])
-    temp = []
-    curr_race_id = results[0][0] if results else None
-    for result in results:
-        if curr_race_id != result[0]:
-            quali = Qualifying(
-                race_id=curr_race_id,
-                results=temp
-            )
-            quali_list.append(quali)
-            temp = []
-            curr_race_id = result[0]
-        temp.append((result[1], result[2], result[3]))
-
-    if temp:
-        quali = Qualifying(
-            race_id=curr_race_id,
-            results=temp
-        )
-        quali_list.append(quali)
+    for race_id, rows in qualis.groupby('raceId', sort=True).indices.items():
+        quali_list.append(Qualifying(
+            race_id=race_id,
+            results=[result_rows[i] for i in rows]
+        ))
 
     return quali_list
 
+@reads("sprint_results")
 def get_sprints(data):
     sprints = data['sprint_results']
 
-    results = []
-    for _, row in sprints.iterrows():
-        time = row['time']
-        time_seconds = None
-        if time and time != '\\N' and '-' not in time and '+' not in time and ':' in time:
-            time_parts = time.split(':')
-            if len(time_parts) == 3:
-                time_seconds = int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + float(time_parts[2])
-            elif len(time_parts) == 2:
-                time_seconds = int(time_parts[0]) * 60 + float(time_parts[1])
-            else:
-                time_seconds = float(time_parts[0])
-
-        results.append((
-            row['raceId'],
-            row['driverId'],
-            row['constructorId'],
-            row['position'],
-            row['statusId'],
-            row['grid'],
-            time_seconds
-        ))
+    driver_ids = sprints['driverId'].tolist()
+    result_rows = list(zip(driver_ids, sprints['constructorId'].tolist(),
+                           optional_ints(sprints['position']), sprints['statusId'].tolist()))
+    starting_rows = list(zip(driver_ids, sprints['grid'].tolist()))
+    times = time_seconds(sprints['time']).groupby(sprints['raceId']).last()
 
     sprint_list = []
-    results.sort(key=lambda x: x[0])
-    temp1 = []
-    temp2 = []
-    time = None
-    curr_race_id = results[0][0] if results else None
-    for result in results:
-        if curr_race_id != result[0]:
-            sprint = Sprint(
-                race_id=curr_race_id,
-                results=temp1,
-                starting_positions=temp2,
-                total_time=time
-            )
-            sprint_list.append(sprint)
-            temp1 = []
-            temp2 = []
-            time = None
-            curr_race_id = result[0]
-        temp1.append((result[1], result[2], result[3], result[4]))
-        temp2.append((result[1], result[5]))
-        if result[6] is not None:
-            time = result[6]
-
-    if temp1 and temp2 and time is not None:
-        sprint = Sprint(
-            race_id=curr_race_id,
-            results=temp1,
-            starting_positions=temp2,
+    groups = sprints.groupby('raceId', sort=True).indices
+    for race_id, rows in groups.items():
+        time = times[race_id]
+        time = None if time != time else time
+        # the last sprint only counts once it has a winning time, as it may still be in progress
+        if race_id == next(reversed(groups)) and time is None:
+            continue
+        sprint_list.append(Sprint(
+            race_id=race_id,
+            results=[result_rows[i] for i in rows],
+            starting_positions=[starting_rows[i] for i in rows],
             total_time=time
-        )
-        sprint_list.append(sprint)
+        ))
 
     return sprint_list
 
+@reads("status")
 def get_statuses(data):
     statuses = data['status']
-    status_dict = {}
-    for _, row in statuses.iterrows():
-        status_dict[row['statusId']] = row['status']
-    return status_dict
-
-def compile_seasons(races):
-    seasons = []
-
-    races_sorted = races.copy()
-    races_sorted.sort(key=lambda x: x.date)
-
-    for year in range(1950, datetime.now().year + 1):
-        races_filtered = list(filter(lambda x: x.date.year == year, races_sorted))
-        seasons.append(Season(
-            year=year,
-            races=races_filtered
-        ))
+    return dict(zip(statuses['statusId'].tolist(), statuses['status'].tolist()))
 
-    return seasons
+CONSUMERS = [get_drivers, get_teams, get_races, get_qualis, get_sprints, get_statuses]
@@ -0,0 +1,206 @@
+import csv
+import math
+import os
+import time
+from datetime import date, datetime
+
+from .dataclasses import *
+from .config import *
+from .profiling import report, record
+from .table_cache import CachedTable, open_table_cache
+
+# Loader for a local copy of the dataset with nothing but the csv module: no pandas, numpy or kagglehub.
+# fetch_data opens each table's cache (table_cache.py, parsing the CSV the first time), or only resolves the
+# table paths without CACHE_DIR. The get_* functions read the columns they need straight into
+# Driver/Team/Race/... objects, from the mapped cache or streamed from the CSV.
+# The get_* functions build exactly what their fetch.py counterparts build from the same files.
+
+def reads(*tables):
+    # declares the dataset tables a get_* function consumes, fetch_data loads only those
+    def register(func):
+        func.tables = tables
+        return func
+    return register
+
+def required_tables(*consumers):
+    tables = []
+    for consumer in consumers:
+        for table in consumer.tables:
+            if table not in tables:
+                tables.append(table)
+    return tables
+
+def fetch_table(table, source, cache_dir=CACHE_DIR):
+    start = time.perf_counter()
+    path = os.path.join(source, f"{table}.csv")
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Table '{table}' not found at {path}.")
+    data = path
+    if cache_dir is not None:
+        try:
+            data = open_table_cache(path, cache_dir)
+        except OSError as e:
+            print(f"Error caching {table}: {e}")
+    return data, time.perf_counter() - start
+
+def fetch_data(source, tables=None, cache_dir=CACHE_DIR):
+    # table -> its CachedTable, or its CSV path when it is not cached
+    if tables is None:
+        tables = required_tables(*CONSUMERS)
+    report(1, f"Loading data from {source}...")
+    data = {}
+    for table in tables:
+        data[table], seconds = fetch_table(table, source, cache_dir)
+        record(f"fetch.{table}", seconds)
+        rows = f"{data[table].rows} rows" if isinstance(data[table], CachedTable) else "streamed from the CSV"
+        report(2, f"\tLoaded {table} ({rows}) in {seconds:.2f}s")
+    return data
+
+def cached_column(table, name, convert):
+    # convert(field) for every field of a cached column, numbers the cache already holds are not converted again
+    if table.kind(name) == "int" and convert in (int, optional_int) and not table.has_nulls(name):
+        return table.numbers(name)
+    if table.kind(name) == "str" and convert is str:
+        return table.strings(name)
+    return [convert(value) for value in table.raw(name)]
+
+def read_rows(source, **columns):
+    # streams the given columns of every row of a table (CSV path or CachedTable) as a tuple,
+    # each value converted by its column's function
+    if isinstance(source, CachedTable):
+        missing = [name for name in columns if name not in source.columns]
+        if missing:
+            raise ValueError(f"{os.path.basename(source.source)} has no column {', '.join(missing)}.")
+        yield from zip(*[cached_column(source, name, convert) for name, convert in columns.items()])
+        return
+    with open(source, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        missing = [name for name in columns if name not in header]
+        if missing:
+            raise ValueError(f"{os.path.basename(source)} has no column {', '.join(missing)}.")
+        fields = [(header.index(name), convert) for name, convert in columns.items()]
+        for row in reader:
+            if row:
+                yield tuple([convert(row[i]) for i, convert in fields])
+
+def optional_int(value):
+    # '\N' and anything else non numeric becomes None
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        return int(number) if math.isfinite(number) else None
+
+def time_seconds(value):
+    # race/sprint times like "1:34:50.616" or "34:50.616" in seconds, None for gaps ("+5.478"), laps and '\N'
+    if ':' not in value or '-' in value or '+' in value:
+        return None
+    parts = value.split(':')
+    try:
+        if len(parts) >= 3:
+            return float(parts[0]) * 3600 + float(parts[1]) * 60 + float(parts[2])
+        return float(parts[0]) * 60 + float(parts[1])
+    except ValueError:
+        return None
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+@reads("drivers")
+def get_drivers(data):
+    return [Driver(id=driver_id, forename=forename, surname=surname, ratings=[])
+            for driver_id, forename, surname in read_rows(data["drivers"], driverId=int, forename=str, surname=str)]
+
+@reads("constructors")
+def get_teams(data):
+    return [Team(id=team_id, name=name, ratings=[])
+            for team_id, name in read_rows(data["constructors"], constructorId=int, name=str)]
+
+@reads("races", "results")
+def get_races(data):
+    races_dict = {}
+    for race_id, name, race_date, circuit_id in read_rows(data["races"], raceId=int, name=str, date=parse_date,
+                                                          circuitId=int):
+        races_dict[race_id] = Race(
+            id=race_id,
+            name=name,
+            date=race_date,
+            circuit_id=circuit_id,
+            results=[],
+            starting_positions=[],
+        )
+
+    for race_id, driver_id, team_id, position, status_id, grid, time in read_rows(
+            data["results"], raceId=int, driverId=int, constructorId=int, position=optional_int, statusId=int,
+            grid=int, time=time_seconds):
+        race = races_dict[race_id]
+        race.results.append((driver_id, team_id, position, status_id))
+        race.starting_positions.append((driver_id, grid))
+        if time is not None:
+            race.total_time = time
+
+    today = date.today()
+    races_list = [race for race in races_dict.values() if race.date <= today]
+    races_list.sort(key=lambda x: x.date)
+
+    return races_list
+
+@reads("qualifying")
+def get_qualis(data):
+    results = {}
+    for race_id, driver_id, team_id, position in read_rows(data["qualifying"], raceId=int, driverId=int,
+                                                           constructorId=int, position=optional_int):
+        results.setdefault(race_id, []).append((driver_id, team_id, position))
+    return [Qualifying(race_id=race_id, results=results[race_id]) for race_id in sorted(results)]
+
+@reads("sprint_results")
+def get_sprints(data):
+    results, starting_positions, times = {}, {}, {}
+    for race_id, driver_id, team_id, position, status_id, grid, time in read_rows(
+            data["sprint_results"], raceId=int, driverId=int, constructorId=int, position=optional_int,
+            statusId=int, grid=int, time=time_seconds):
+        results.setdefault(race_id, []).append((driver_id, team_id, position, status_id))
+        starting_positions.setdefault(race_id, []).append((driver_id, grid))
+        if time is not None:
+            times[race_id] = time
+
+    sprint_list = []
+    last_race_id = max(results, default=None)
+    for race_id in sorted(results):
+        time = times.get(race_id)
+        # the last sprint only counts once it has a winning time, as it may still be in progress
+        if race_id == last_race_id and time is None:
+            continue
+        sprint_list.append(Sprint(
+            race_id=race_id,
+            results=results[race_id],
+            starting_positions=starting_positions[race_id],
+            total_time=time
+        ))
+
+    return sprint_list
+
+@reads("status")
+def get_statuses(data):
+    return dict(read_rows(data["status"], statusId=int, status=str))
+
+CONSUMERS = [get_drivers, get_teams, get_races, get_qualis, get_sprints, get_statuses]
+
+def compile_seasons(races):
+    seasons = []
+
+    races_sorted = races.copy()
+    races_sorted.sort(key=lambda x: x.date)
+
+    for year in range(1950, datetime.now().year + 1):
+        races_filtered = list(filter(lambda x: x.date.year == year, races_sorted))
+        seasons.append(Season(
+            year=year,
+            races=races_filtered
+        ))
+
+    return seasons
@@ -1,11 +1,13 @@
 from .dataclasses import *
+from .config import *
+from functools import lru_cache
 from math import log
 
 def distribution_function(x, a, N):
     try:
         x = float(x)
         a = float(a)
-    except ValueError:
+    except (ValueError, TypeError):
         return 0
     if x <= 0:
         return N
@@ -20,7 +22,7 @@ def half_distribution_function(x, a, N):
     try:
         x = float(x)
         a = float(a)
-    except ValueError:
+    except (ValueError, TypeError):
         return 0
 
     if x < 0 or x > a:
@@ -31,11 +33,50 @@ def half_distribution_function(x, a, N):
 def influence_function(x, a, b):
     try:
         x = float(x)
-    except ValueError:
+    except (ValueError, TypeError):
         return 0
     c = 1 - b * log(a + 1)
     return log(a*x + 1) * b + c
 
+# Kernel tables: a race only ever scores integer positions against its field size, so the kernels are
+# evaluated once per (a, N) for every integer x from 0 to a + 1 and looked up from then on.
+# Values come from the scalar kernels, so a lookup gives exactly what calling them would.
+
+@lru_cache(maxsize=None)
+def distribution_table(a, N):
+    return tuple(distribution_function(x, a, N) for x in range(max(int(a), 0) + 2))
+
+@lru_cache(maxsize=None)
+def half_distribution_table(a, N):
+    return tuple(half_distribution_function(x, a, N) for x in range(max(int(a), 0) + 2))
+
+def table_value(table, x, function, a, N):
+    # table[x] for the integer positions the table holds, function(x, a, N) for anything else
+    if type(x) is int and 0 <= x < len(table):
+        return table[x]
+    return function(x, a, N)
+
+def season_weights(seasons, params=DEFAULT_PARAMETERS):
+    # year -> num_races_weight, the current season is weighted as if it had its full length
+    most_races_in_season = max((len(season.races) for season in seasons), default=0)
+    weights = {}
+    for season in seasons:
+        season_len = len(season.races)
+        if season.year == datetime.now().year:
+            season_len = params.current_season_length
+        weights[season.year] = most_races_in_season / season_len if season_len else 1 # no races for it to weight
+    return weights
+
+def remaining_races(seasons, checkpoint=None, until=None):
+    # (season, races still to compute, whether the season start rules still have to run), up to season until
+    for season in seasons:
+        if until is not None and season.year > until:
+            continue
+        if checkpoint is None or season.year > checkpoint.season:
+            yield season, season.races, True
+        elif season.year == checkpoint.season:
+            yield season, season.races[checkpoint.season_races:], False
+
 def is_driver_fault(status_id, statuses):
     bad = [#3, # Accident
            #4, # Collision
@@ -62,39 +103,10 @@ def get_team_by_id(teams, team_id):
             return team
     return None
 
-def get_driver_by_name(drivers, name):
-    for driver in drivers:
-        full_name = f"{driver.forename} {driver.surname}"
-        if full_name.lower() == name.lower():
-            return driver
-    return None
-
-def get_team_by_name(teams, name):
-    for team in teams:
-        if team.name.lower() == name.lower():
-            return team
-    return None
-
-def get_last_race_drivers(drivers, races):
-    races.sort(key=lambda x: x.date, reverse=True)
-    last_race = races[0]
-    last_race_drivers = set()
-    for result in last_race.results:
-        driver = get_driver_by_id(drivers, result[0])
-        if driver not in last_race_drivers:
-            last_race_drivers.add(driver)
-    if last_race_drivers == set():
-        last_race_drivers = get_last_race_drivers(drivers, races[1:])
-    return list(last_race_drivers)
+def get_last_race_drivers(drivers, participation):
+    grid = set(participation.grid[0])
+    return [driver for driver in drivers if driver.id in grid]
 
-def get_last_race_teams(teams, races):
-    races.sort(key=lambda x: x.date, reverse=True)
-    last_race = races[0]
-    last_race_teams = set()
-    for result in last_race.results:
-        team = get_team_by_id(teams, result[1])
-        if team not in last_race_teams:
-            last_race_teams.add(team)
-    if last_race_teams == set():
-        last_race_teams = get_last_race_teams(teams, races[1:])
-    return list(last_race_teams)
+def get_last_race_teams(teams, participation):
+    grid = set(participation.grid[1])
+    return [team for team in teams if team.id in grid]
@@ -0,0 +1,173 @@
+from array import array
+from datetime import date
+
+NO_DATE = 0 # day ordinal stored for ratings without a date (initial and reset ratings)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+class RatingHistory:
+    # Compact (rating, date) history: ratings in a float64 (or float32) array, dates as int32 day ordinals.
+    # Indexing and iteration still yield (rating, date) tuples, so code written against lists keeps working.
+    # Peak, trough, race count and the sum of race ratings are kept up to date on append, so they cost O(1) to read.
+    def __init__(self, entries=(), typecode='d'):
+        self.values = array(typecode)
+        self.days = array('i')
+        self.reset_aggregates()
+        for entry in entries:
+            self.append(entry)
+
+    def reset_aggregates(self):
+        self.peak_index = None
+        self.trough_index = None
+        self.race_count = 0 # ratings with a date, one per race
+        self.race_sum = 0.0
+
+    def recompute_aggregates(self):
+        self.reset_aggregates()
+        for i in range(len(self.values)):
+            self._aggregate(i)
+
+    def _aggregate(self, i):
+        rating = self.values[i]
+        if self.peak_index is None or rating > self.values[self.peak_index]:
+            self.peak_index = i
+        if self.trough_index is None or rating < self.values[self.trough_index]:
+            self.trough_index = i
+        if self.days[i] != NO_DATE:
+            self.race_count += 1
+            self.race_sum += rating
+
+    def append(self, entry):
+        rating, day = entry
+        self.values.append(rating)
+        self.days.append(day.toordinal() if day is not None else NO_DATE)
+        self._aggregate(len(self.values) - 1)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def _entry(self, i):
+        day = self.days[i]
+        return (self.values[i], date.fromordinal(day) if day != NO_DATE else None)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._entry(i) for i in range(*key.indices(len(self.values)))]
+        return self._entry(key)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        for i in range(len(self.values)):
+            yield self._entry(i)
+
+    def __eq__(self, other):
+        if isinstance(other, RatingHistory):
+            return self.values == other.values and self.days == other.days
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "trough_index" not in state: # pickled before the running aggregates
+            self.recompute_aggregates()
+
+    def __repr__(self):
+        return f"RatingHistory({len(self)} ratings)"
+
+    @property
+    def current(self):
+        return self.values[-1]
+
+    @property
+    def peak(self):
+        if self.peak_index is None:
+            raise IndexError("peak of an empty rating history")
+        return self._entry(self.peak_index)
+
+    @property
+    def peak_value(self):
+        return self.peak[0]
+
+    @property
+    def trough(self):
+        if self.trough_index is None:
+            raise IndexError("trough of an empty rating history")
+        return self._entry(self.trough_index)
+
+    @property
+    def mean(self):
+        # career mean over race ratings, None before the first race
+        return self.race_sum / self.race_count if self.race_count else None
+
+    def arrays(self):
+        # copies, a live buffer export would stop the history from growing
+        import numpy as np
+        return np.array(self.values), np.array(self.days, dtype=np.int32)
+
+    def between(self, startdate=None, enddate=None):
+        # dated ratings within [startdate, enddate] as (ratings, datetime64[D] dates) arrays
+        import numpy as np
+        values, days = self.arrays()
+        mask = days != NO_DATE
+        if startdate is not None:
+            mask &= days >= startdate.toordinal()
+        if enddate is not None:
+            mask &= days <= enddate.toordinal()
+        return values[mask], (days[mask] - EPOCH_ORDINAL).astype('datetime64[D]')
+
+class MappedRatingHistory(RatingHistory):
+    # RatingHistory read straight from a memory-mapped snapshot; the array views are made on first use and
+    # the history is copied into its own arrays the first time it grows
+    def __init__(self, buffer, offset, length, aggregates=None):
+        # aggregates is (peak_index, trough_index, race_count, race_sum), read from the file when not given
+        self.buffer = buffer
+        self.offset = offset
+        self.length = length
+        self._values = None
+        self._days = None
+        if aggregates is None:
+            self.recompute_aggregates()
+        else:
+            self.peak_index, self.trough_index, self.race_count, self.race_sum = aggregates
+
+    @property
+    def values(self):
+        if self._values is None:
+            end = self.offset + self.length * 8
+            self._values = memoryview(self.buffer)[self.offset:end].cast('d')
+        return self._values
+
+    @values.setter
+    def values(self, values):
+        self._values = values
+
+    @property
+    def days(self):
+        if self._days is None:
+            start = self.offset + self.length * 8
+            self._days = memoryview(self.buffer)[start:start + self.length * 4].cast('i')
+        return self._days
+
+    @days.setter
+    def days(self, days):
+        self._days = days
+
+    def __len__(self):
+        return self.length
+
+    def append(self, entry):
+        if not isinstance(self.values, array):
+            self.values = array('d', self.values)
+            self.days = array('i', self.days)
+            self.buffer = None
+        super().append(entry)
+        self.length += 1
+
+    def __reduce__(self):
+        # pickled as a plain history, the mapping does not outlive the process
+        state = {"values": array('d', self.values), "days": array('i', self.days), "peak_index": self.peak_index,
+                 "trough_index": self.trough_index, "race_count": self.race_count, "race_sum": self.race_sum}
+        return (RatingHistory, (), state)
@@ -0,0 +1,86 @@
+from .dataclasses import *
+
+def index_by_id(entities):
+    return {entity.id: entity for entity in entities}
+
+def build_race_weekends(races, qualis, sprints):
+    # first match wins, same as the next(...) scans it replaces (shared drives list a driver twice)
+    qualis_by_race = {}
+    for quali in qualis:
+        qualis_by_race.setdefault(quali.race_id, quali)
+    sprints_by_race = {}
+    for sprint in sprints:
+        sprints_by_race.setdefault(sprint.race_id, sprint)
+
+    weekends = {}
+    for race in races:
+        weekend = RaceWeekend(
+            race=race,
+            quali=qualis_by_race.get(race.id),
+            sprint=sprints_by_race.get(race.id),
+            entries={}
+        )
+        for result in race.results:
+            weekend.entries.setdefault(result[0], RaceEntry(result=result))
+        for pos in race.starting_positions:
+            entry = weekend.entries.get(pos[0])
+            if entry and entry.starting_position is None:
+                entry.starting_position = pos
+        if weekend.quali:
+            for result in weekend.quali.results:
+                entry = weekend.entries.get(result[0])
+                if entry and entry.quali_result is None:
+                    entry.quali_result = result
+        if weekend.sprint:
+            for result in weekend.sprint.results:
+                entry = weekend.entries.get(result[0])
+                if entry and entry.sprint_result is None:
+                    entry.sprint_result = result
+            for pos in weekend.sprint.starting_positions:
+                entry = weekend.entries.get(pos[0])
+                if entry and entry.sprint_starting_position is None:
+                    entry.sprint_starting_position = pos
+        weekends[race.id] = weekend
+    return weekends
+
+def _participate(entity_id, year, date, season_ids, seasons, race_dates):
+    if entity_id not in season_ids:
+        season_ids.add(entity_id)
+        seasons.setdefault(entity_id, []).append(year)
+    first = race_dates[entity_id][0] if entity_id in race_dates else date
+    race_dates[entity_id] = (first, date)
+
+def build_participation(seasons):
+    # who raced when, in one pass over the results (seasons and their races in date order)
+    participation = Participation({}, {}, {}, {}, {}, {}, ([], []))
+    last_race = None
+    for season in seasons:
+        season_drivers = participation.season_drivers.setdefault(season.year, set())
+        season_teams = participation.season_teams.setdefault(season.year, set())
+        for race in season.races:
+            for result in race.results:
+                _participate(result[0], season.year, race.date, season_drivers,
+                             participation.driver_seasons, participation.driver_race_dates)
+                _participate(result[1], season.year, race.date, season_teams,
+                             participation.team_seasons, participation.team_race_dates)
+            if race.results:
+                last_race = race
+    if last_race is not None:
+        participation.grid = (list(dict.fromkeys(result[0] for result in last_race.results)),
+                              list(dict.fromkeys(result[1] for result in last_race.results)))
+    return participation
+
+def set_race_dates(participation, drivers, teams):
+    for entities, dates in ((drivers, participation.driver_race_dates), (teams, participation.team_race_dates)):
+        for entity in entities:
+            entity.first_race_date, entity.last_race_date = dates.get(entity.id, (None, None))
+
+def season_team_ids(participation, year):
+    return sorted(participation.season_teams.get(year, ()))
+
+def reentry_team_ids(participation, year):
+    # teams racing in the season that did not race in the one before, none when there is no season before
+    if year - 1 not in participation.season_teams:
+        return []
+    previous = participation.season_teams[year - 1]
+    return [team_id for team_id in season_team_ids(participation, year) if team_id not in previous]
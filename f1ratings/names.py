@@ -0,0 +1,126 @@
+import re
+import unicodedata
+
+from .dataclasses import *
+
+# Name lookups for drivers and teams. Names are folded (accents stripped, case folded, spaces collapsed), so
+# "sergio perez", "Sergio Pérez" and "SERGIO  PEREZ" all find the same driver. A lookup tries, in order:
+#   exact   the full driver name or team name
+#   alias   a driver surname, when only one driver has it
+#   prefix  the start of a full name or surname, when only one entity has a name starting with it
+#   fuzzy   the closest full name or surname within a small edit distance, when only one entity is closest
+# The first three walk a dict or trie once, so they cost O(length of the name) whatever the number of entities.
+# The trie is only built when a name is not found exactly, so exact lookups from the CLI skip its cost.
+
+STAGES = ("exact", "alias", "prefix", "fuzzy")
+EXACT_STAGES = ("exact", "alias") # stages that only find a name as it is written, for lookups that must not guess
+CHILDREN, MATCHES, ENTITIES = 0, 1, 2 # trie node: [children by char, entities below (at most 2), entities ending here]
+
+def fold_name(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+def file_name(name):
+    # folded name safe to use as a file name, e.g. "Sergio Pérez" -> "sergio_perez"
+    return re.sub(r"[^a-z0-9]+", "_", fold_name(name)).strip("_")
+
+def _add_match(matches, entity):
+    # at most two entities are kept, enough to tell a unique match from an ambiguous one
+    if len(matches) < 2 and not any(match is entity for match in matches):
+        matches.append(entity)
+
+def _unique(matches):
+    return matches[0] if len(matches) == 1 else None
+
+def max_distance(name):
+    return 1 if len(name) < 6 else 2
+
+class NameIndex:
+    def __init__(self, entities, names, aliases=lambda entity: []):
+        # names(entity) is the full name, aliases(entity) the other names it is known by
+        self.exact_names = {}
+        self.alias_names = {}
+        self.keys = [] # (folded name, entity) for the trie
+        self._trie = None
+        for entity in entities:
+            name = fold_name(names(entity))
+            self.exact_names.setdefault(name, entity)
+            self.keys.append((name, entity))
+            for alias in aliases(entity):
+                alias = fold_name(alias)
+                _add_match(self.alias_names.setdefault(alias, []), entity)
+                self.keys.append((alias, entity))
+
+    @property
+    def trie(self):
+        if self._trie is None:
+            self._trie = [{}, [], []]
+            for name, entity in self.keys:
+                node = self._trie
+                for char in name:
+                    child = node[CHILDREN].get(char)
+                    if child is None:
+                        child = node[CHILDREN][char] = [{}, [], []]
+                    node = child
+                    _add_match(node[MATCHES], entity)
+                _add_match(node[ENTITIES], entity)
+        return self._trie
+
+    def exact(self, name):
+        return self.exact_names.get(fold_name(name))
+
+    def alias(self, name):
+        return _unique(self.alias_names.get(fold_name(name), []))
+
+    def prefix(self, name):
+        node = self.trie
+        for char in fold_name(name):
+            node = node[CHILDREN].get(char)
+            if node is None:
+                return None
+        return _unique(node[MATCHES])
+
+    def fuzzy(self, name):
+        # Levenshtein distance against every indexed name, walking the trie and dropping branches already too far off
+        name = fold_name(name)
+        limit = max_distance(name)
+        best_distance = limit + 1
+        best = []
+        stack = [(self.trie, list(range(len(name) + 1)))]
+        while stack:
+            node, row = stack.pop()
+            if node[ENTITIES] and row[-1] <= limit:
+                if row[-1] < best_distance:
+                    best_distance, best = row[-1], []
+                if row[-1] == best_distance:
+                    for entity in node[ENTITIES]:
+                        _add_match(best, entity)
+            for char, child in node[CHILDREN].items():
+                next_row = [row[0] + 1]
+                for i, name_char in enumerate(name, 1):
+                    next_row.append(min(next_row[i - 1] + 1, row[i] + 1, row[i - 1] + (name_char != char)))
+                if min(next_row) <= limit:
+                    stack.append((child, next_row))
+        return _unique(best)
+
+    def find(self, name, stages=STAGES):
+        return find_by_name(name, [self], stages)
+
+def match_by_name(name, indexes, stages=STAGES):
+    # (first match, stage that found it) over the indexes stage by stage, so an exact team name wins over a driver
+    # prefix, (None, None) when no stage finds the name
+    for stage in stages:
+        for index in indexes:
+            entity = getattr(index, stage)(name)
+            if entity is not None:
+                return entity, stage
+    return None, None
+
+def find_by_name(name, indexes, stages=STAGES):
+    return match_by_name(name, indexes, stages)[0]
+
+def driver_index(drivers):
+    return NameIndex(drivers, lambda driver: f"{driver.forename} {driver.surname}", lambda driver: [driver.surname])
+
+def team_index(teams):
+    return NameIndex(teams, lambda team: team.name)
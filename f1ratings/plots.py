@@ -1,172 +1,254 @@
-import matplotlib.pyplot as plt
+import math
+
 import matplotlib as mpl
+import numpy as np
+from matplotlib import dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from .config import PLOT_BULK_THRESHOLD, PLOT_COLORMAP, PLOT_DPI, PLOT_DOWNSAMPLE
+
+# Every plot draws on a Figure through its Axes, never through pyplot state, so figures can be drawn
+# side by side in threads or worker processes. pyplot is only imported to show a figure in a window.
+# Long histories are downsampled to the pixel columns they span before they reach matplotlib (downsample="lttb"
+# or "minmax"), which keeps the shape of every line while drawing far fewer markers; downsample=None draws every rating.
+# Plots of more than PLOT_BULK_THRESHOLD drivers/teams draw every line as one LineCollection and every marker as one
+# scatter instead of a Line2D per entity, with one marker where several would overlap, and leave out the legend,
+# which could not list them all anyway.
+
+FIGURE_SIZE = (10, 5)
+
+def new_figure():
+    # headless figure on the Agg canvas, not registered with pyplot
+    figure = Figure(figsize=FIGURE_SIZE, dpi=PLOT_DPI) # drawn at the dpi it is saved at, so downsampling targets saved pixels
+    FigureCanvasAgg(figure)
+    return figure
+
+def window_figure():
+    import matplotlib.pyplot as plt
+    return plt.figure(figsize=FIGURE_SIZE)
+
+def show(*figures):
+    import matplotlib.pyplot as plt
+    plt.show()
+    for figure in figures:
+        plt.close(figure)
+
+def values_at(ratings, dates, at):
+    # first rating on each of the dates in at, NaN where there is none (dates are in race order)
+    idx = np.searchsorted(dates, at)
+    found = idx < len(dates)
+    found[found] = dates[idx[found]] == at[found]
+    values = np.full(len(at), np.nan)
+    values[found] = ratings[idx[found]]
+    return values
+
+def minmax_downsample(x, y, columns):
+    # indices of the first, last, lowest and highest point in each of columns equal slices of the x range
+    n = len(x)
+    if n <= 4 * columns:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    span = x[-1] - x[0]
+    if span == 0:
+        bucket = np.zeros(n, dtype=np.int64)
+    else:
+        bucket = np.minimum(((x - x[0]) * (columns / span)).astype(np.int64), columns - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    order = np.lexsort((y, bucket)) # x is sorted, so every bucket keeps its index range, ordered by y within it
+    return np.unique(np.concatenate([starts, ends, order[starts], order[ends]]))
+
+def lttb_downsample(x, y, points):
+    # indices of points Largest-Triangle-Three-Buckets picks: first, last, and in each bucket between them
+    # the point making the largest triangle with the last pick and the mean of the next bucket
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    edges = np.r_[np.linspace(1, n - 1, points - 1).astype(np.int64), n]
+    sizes = np.diff(edges)
+    mean_x = (np.add.reduceat(x, edges[:-1]) / sizes).tolist() # buckets hold a few points each, so the picks
+    mean_y = (np.add.reduceat(y, edges[:-1]) / sizes).tolist() # below run on plain floats, not numpy slices
+    xs, ys, edges = x.tolist(), y.tolist(), edges.tolist()
+    picks = [0]
+    a = 0
+    for i in range(points - 2):
+        ax, ay = xs[a], ys[a]
+        dx, dy = mean_x[i + 1] - ax, mean_y[i + 1] - ay
+        best, best_area = edges[i], -1.0
+        for j in range(edges[i], edges[i + 1]):
+            area = abs(dx * (ys[j] - ay) - dy * (xs[j] - ax))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        picks.append(a)
+    picks.append(n - 1)
+    return np.array(picks, dtype=np.int64)
+
+DOWNSAMPLERS = {
+    "minmax": minmax_downsample,
+    "lttb": lttb_downsample
+}
+
+def downsample(dates, values, columns, method=PLOT_DOWNSAMPLE):
+    # (dates, values) thinned to what columns pixel columns can show, NaN gaps still break the line
+    if method is None or len(dates) <= columns:
+        return dates, values
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method '{method}'.")
+    missing = np.isnan(values)
+    finite = np.flatnonzero(~missing)
+    gaps = np.flatnonzero(missing & ~np.r_[False, missing[:-1]])
+    keep = finite[DOWNSAMPLERS[method](dates[finite].astype(np.int64), values[finite], columns)]
+    keep = np.union1d(keep, gaps)
+    return dates[keep], values[keep]
+
+def _thin(ax, series, method):
+    # every (dates, values) in series downsampled to the pixel columns its dates span on the shared x axis
+    if method is None:
+        return series
+    spans = [(dates[0], dates[-1]) for dates, _ in series if len(dates)]
+    if not spans:
+        return series
+    first = min(start for start, _ in spans).astype(np.int64)
+    last = max(end for _, end in spans).astype(np.int64)
+    width = ax.figure.get_figwidth() * ax.figure.dpi * ax.get_position().width
+    thinned = []
+    for dates, values in series:
+        if len(dates) == 0:
+            thinned.append((dates, values))
+            continue
+        days = dates.astype(np.int64)
+        columns = max(1, math.ceil(width * (days[-1] - days[0]) / max(last - first, 1)))
+        thinned.append(downsample(dates, values, columns, method))
+    return thinned
 
-from .config import PLOT_COLORMAP
+def _axes(figure, title):
+    if figure is None:
+        figure = window_figure()
+    ax = figure.subplots()
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Rating")
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid()
+    return figure, ax
 
-def plot_team_rating(team, startdate, enddate):
-    ratings_with_dates = []
-    for rating in team.ratings:
-        if rating[1] is not None:
-            ratings_with_dates.append((rating[0], rating[1]))
-    ratings_with_dates = [(rating[0], rating[1]) for rating in ratings_with_dates if startdate <= rating[1] <= enddate]
-    if not ratings_with_dates:
+def _tight_layout(figure):
+    figure.tight_layout(rect=(0, 0, 0.95, 1))
+    figure.set_layout_engine(None) # laid out once, otherwise savefig runs a whole extra draw to lay it out again
+
+def _legend_outside(figure, ax):
+    ax.legend(loc='upper left', bbox_to_anchor=(1.02, 1), borderaxespad=0)
+    _tight_layout(figure)
+
+def _colors(count):
+    return mpl.colormaps[PLOT_COLORMAP].resampled(count)
+
+def _draw_series(figure, ax, names, series, bulk=None):
+    # one line per (dates, values) in series, labelled with names
+    colors = _colors(len(series))
+    if bulk is None:
+        bulk = len(series) > PLOT_BULK_THRESHOLD
+    if not bulk:
+        for i, (name, (dates, values)) in enumerate(zip(names, series)):
+            ax.plot(dates, values, marker='o', label=name, color=colors(i))
+        _legend_outside(figure, ax)
+        return
+    ax.xaxis_date()
+    x = [mdates.date2num(dates) for dates, _ in series]
+    line_colors = colors(np.arange(len(series)))
+    ax.add_collection(LineCollection([np.column_stack((days, values)) for days, (_, values) in zip(x, series)],
+                                     colors=line_colors))
+    ax.autoscale_view()
+    points = np.column_stack((np.concatenate(x), np.concatenate([values for _, values in series])))
+    owners = np.repeat(np.arange(len(series)), [len(days) for days in x])
+    keep = _marker_cells(ax, points, owners)
+    ax.scatter(points[keep, 0], points[keep, 1], s=mpl.rcParams['lines.markersize'] ** 2, marker='o', linewidths=0,
+               c=line_colors[owners[keep]])
+    _tight_layout(figure)
+
+def _marker_cells(ax, points, owners):
+    # indices of the first point of each series in every half-marker-sized cell of the axes, markers closer
+    # than that overlap into the same dot, and every marker costs as much to draw however small it is
+    size = max(mpl.rcParams['lines.markersize'] * ax.figure.dpi / 72 / 2, 1)
+    pixels = ax.transData.transform(points)
+    finite = np.flatnonzero(np.isfinite(pixels).all(axis=1))
+    cells = np.column_stack((owners[finite], np.floor(pixels[finite] / size).astype(np.int64)))
+    _, first = np.unique(cells, axis=0, return_index=True)
+    return np.sort(finite[first])
+
+def plot_team_rating(team, startdate, enddate, figure=None, downsample=PLOT_DOWNSAMPLE):
+    ratings, dates = team.ratings.between(startdate, enddate)
+    if len(ratings) == 0:
         return None
-    ratings = [rating[0] for rating in ratings_with_dates]
-    dates = [rating[1] for rating in ratings_with_dates if rating[1] is not None]
-    plt.figure(figsize=(10, 5))
-    plt.plot(dates, ratings, marker='o')
-    plt.title(f"Rating Progression for {team.name}")
-    plt.xlabel("Date")
-    plt.ylabel("Rating")
-    plt.xticks(rotation=45)
-    plt.grid()
-    plt.tight_layout(rect=(0, 0, 0.95, 1))
-    return plt
-
-def plot_teams_rating(teams, startdate, enddate):
-    ratings_with_dates = {}
+    figure, ax = _axes(figure, f"Rating Progression for {team.name}")
+    [(dates, ratings)] = _thin(ax, [(dates, ratings)], downsample)
+    ax.plot(dates, ratings, marker='o')
+    _tight_layout(figure)
+    return figure
+
+def plot_teams_rating(teams, startdate, enddate, figure=None, downsample=PLOT_DOWNSAMPLE, bulk=None):
+    ratings, dates = {}, {}
     for team in teams:
-        ratings_with_dates[team.name] = []
-        for rating in team.ratings:
-            if rating[1] is not None:
-                ratings_with_dates[team.name].append((rating[0], rating[1]))
-    ratings_with_dates = {team_name: [(rating[0], rating[1]) for rating in ratings if startdate <= rating[1] <= enddate]
-                           for team_name, ratings in ratings_with_dates.items()}
-    if not ratings_with_dates:
+        ratings[team.name], dates[team.name] = team.ratings.between(startdate, enddate)
+    if not ratings:
         return None
-    ratings = {team_name: [rating[0] for rating in ratings_with_dates[team_name]] for team_name in ratings_with_dates}
-    dates = {team_name: [rating[1] for rating in ratings_with_dates[team_name] if rating[1] is not None] for team_name in ratings_with_dates}
-    plt.figure(figsize=(10, 5))
-    colors = plt.get_cmap(PLOT_COLORMAP, len(ratings))
-    for i, team_name in enumerate(ratings):
-        plt.plot(dates[team_name], ratings[team_name], marker='o', label=team_name, color=colors(i))
-    plt.title(f"Rating Progression for Teams")
-    plt.xlabel("Date")
-    plt.ylabel("Rating")
-    plt.xticks(rotation=45)
-    plt.grid()
-    plt.legend(loc='upper left', bbox_to_anchor=(1.02, 1), borderaxespad=0)
-    plt.tight_layout(rect=(0, 0, 0.95, 1))
-    return plt
-
-def plot_driver_rating(driver, startdate, enddate):
-    ratings_with_dates = []
-    for rating in driver.ratings:
-        if rating[1] is not None:
-            ratings_with_dates.append((rating[0], rating[1]))
-    ratings_with_dates = [(rating[0], rating[1]) for rating in ratings_with_dates if startdate <= rating[1] <= enddate]
-    if not ratings_with_dates:
+    figure, ax = _axes(figure, "Rating Progression for Teams")
+    series = _thin(ax, [(dates[team_name], ratings[team_name]) for team_name in ratings], downsample)
+    _draw_series(figure, ax, list(ratings), series, bulk)
+    return figure
+
+def plot_driver_rating(driver, startdate, enddate, figure=None, downsample=PLOT_DOWNSAMPLE):
+    ratings, dates = driver.ratings.between(startdate, enddate)
+    if len(ratings) == 0:
         return None
-    ratings = [rating[0] for rating in ratings_with_dates]
-    dates = [rating[1] for rating in ratings_with_dates if rating[1] is not None]
-    plt.figure(figsize=(10, 5))
-    plt.plot(dates, ratings, marker='o')
-    plt.title(f"Rating Progression for {driver.forename} {driver.surname}")
-    plt.xlabel("Date")
-    plt.ylabel("Rating")
-    plt.xticks(rotation=45)
-    plt.grid()
-    plt.tight_layout(rect=(0, 0, 0.95, 1))
-    return plt
-
-def plot_drivers_rating(drivers, startdate, enddate):
-    ratings_with_dates = {}
+    figure, ax = _axes(figure, f"Rating Progression for {driver.forename} {driver.surname}")
+    [(dates, ratings)] = _thin(ax, [(dates, ratings)], downsample)
+    ax.plot(dates, ratings, marker='o')
+    _tight_layout(figure)
+    return figure
+
+def plot_drivers_rating(drivers, startdate, enddate, figure=None, downsample=PLOT_DOWNSAMPLE, bulk=None):
+    ratings, dates = {}, {}
     for driver in drivers:
-        ratings_with_dates[driver.forename + " " + driver.surname] = []
-        for rating in driver.ratings:
-            if rating[1] is not None:
-                ratings_with_dates[driver.forename + " " + driver.surname].append((rating[0], rating[1]))
-    ratings_with_dates = {driver_name: [(rating[0], rating[1]) for rating in ratings if startdate <= rating[1] <= enddate]
-                           for driver_name, ratings in ratings_with_dates.items()}
-    if not ratings_with_dates:
+        driver_name = driver.forename + " " + driver.surname
+        ratings[driver_name], dates[driver_name] = driver.ratings.between(startdate, enddate)
+    if not ratings:
         return None
-    ratings = {driver_name: [rating[0] for rating in ratings_with_dates[driver_name]] for driver_name in ratings_with_dates}
-    dates = {driver_name: [rating[1] for rating in ratings_with_dates[driver_name] if rating[1] is not None] for driver_name in ratings_with_dates}
-    plt.figure(figsize=(10, 5))
-    colors = plt.get_cmap(PLOT_COLORMAP, len(ratings))
-    for i, driver_name in enumerate(ratings):
-        plt.plot(dates[driver_name], ratings[driver_name], marker='o', label=driver_name, color=colors(i))
-    plt.title(f"Rating Progression for Drivers")
-    plt.xlabel("Date")
-    plt.ylabel("Rating")
-    plt.xticks(rotation=45)
-    plt.grid()
-    plt.legend(loc='upper left', bbox_to_anchor=(1.02, 1), borderaxespad=0)
-    plt.tight_layout(rect=(0, 0, 0.95, 1))
-    return plt
-
-def plot_team_and_driver_rating(team, driver, startdate, enddate):
-    team_ratings = []
-    for rating in team.ratings:
-        if rating[1] is not None:
-            team_ratings.append((rating[0], rating[1]))
-    team_ratings = [(rating[0], rating[1]) for rating in team_ratings if startdate <= rating[1] <= enddate]
-    driver_ratings = []
-    for rating in driver.ratings:
-        if rating[1] is not None:
-            driver_ratings.append((rating[0], rating[1]))
-    driver_ratings = [(rating[0], rating[1]) for rating in driver_ratings if startdate <= rating[1] <= enddate]
-    if not team_ratings or not driver_ratings:
+    figure, ax = _axes(figure, "Rating Progression for Drivers")
+    series = _thin(ax, [(dates[driver_name], ratings[driver_name]) for driver_name in ratings], downsample)
+    _draw_series(figure, ax, list(ratings), series, bulk)
+    return figure
+
+def plot_team_and_driver_rating(team, driver, startdate, enddate, figure=None, downsample=PLOT_DOWNSAMPLE):
+    team_ratings, team_dates = team.ratings.between(startdate, enddate)
+    driver_ratings, driver_dates = driver.ratings.between(startdate, enddate)
+    if len(team_ratings) == 0 or len(driver_ratings) == 0:
         return None
-    team_dates = [rating[1] for rating in team_ratings]
-    driver_dates = [rating[1] for rating in driver_ratings]
-    common_dates = sorted(set(team_dates) & set(driver_dates))
-    team_values = [next((rating[0] for rating in team_ratings if rating[1] == date), None) for date in common_dates]
-    driver_values = [next((rating[0] for rating in driver_ratings if rating[1] == date), None) for date in common_dates]
-    plt.figure(figsize=(10, 5))
-    plt.plot(common_dates, team_values, marker='o', label=team.name, color='blue')
-    plt.plot(common_dates, driver_values, marker='o', label=f"{driver.forename} {driver.surname}", color='orange')
-    plt.title(f"Rating Progression: {team.name} vs {driver.forename} {driver.surname}")
-    plt.xlabel("Date")
-    plt.ylabel("Rating")
-    plt.xticks(rotation=45)
-    plt.grid()
-    plt.legend()
-    plt.tight_layout(rect=(0, 0, 0.95, 1))
-    return plt
-
-def plot_teams_and_drivers(teams, drivers, startdate, enddate):
-    team_ratings = {}
-    for team in teams:
-        team_ratings[team.name] = []
-        for rating in team.ratings:
-            if rating[1] is not None:
-                team_ratings[team.name].append((rating[0], rating[1]))
-    driver_ratings = {}
-    for driver in drivers:
-        driver_ratings[driver.forename + " " + driver.surname] = []
-        for rating in driver.ratings:
-            if rating[1] is not None:
-                driver_ratings[driver.forename + " " + driver.surname].append((rating[0], rating[1]))
-    team_ratings = {team_name: [(rating[0], rating[1]) for rating in ratings if startdate <= rating[1] <= enddate]
-                    for team_name, ratings in team_ratings.items()}
-    driver_ratings = {driver_name: [(rating[0], rating[1]) for rating in ratings if startdate <= rating[1] <= enddate]
-                      for driver_name, ratings in driver_ratings.items()}
+    common_dates = np.intersect1d(team_dates, driver_dates)
+    team_values = values_at(team_ratings, team_dates, common_dates)
+    driver_values = values_at(driver_ratings, driver_dates, common_dates)
+    figure, ax = _axes(figure, f"Rating Progression: {team.name} vs {driver.forename} {driver.surname}")
+    (team_dates, team_values), (driver_dates, driver_values) = _thin(ax, [(common_dates, team_values), (common_dates, driver_values)], downsample)
+    ax.plot(team_dates, team_values, marker='o', label=team.name, color='blue')
+    ax.plot(driver_dates, driver_values, marker='o', label=f"{driver.forename} {driver.surname}", color='orange')
+    ax.legend()
+    _tight_layout(figure)
+    return figure
+
+def plot_teams_and_drivers(teams, drivers, startdate, enddate, figure=None, downsample=PLOT_DOWNSAMPLE, bulk=None):
+    team_ratings = {team.name: team.ratings.between(startdate, enddate) for team in teams}
+    driver_ratings = {driver.forename + " " + driver.surname: driver.ratings.between(startdate, enddate) for driver in drivers}
     if not team_ratings or not driver_ratings:
         return None
-    common_dates = set()
-    for ratings in team_ratings.values():
-        common_dates.update(rating[1] for rating in ratings)
-    for ratings in driver_ratings.values():
-        common_dates.update(rating[1] for rating in ratings)
-    common_dates = sorted(common_dates & set([rating[1] for ratings in team_ratings.values() for rating in ratings]) &
-                           set([rating[1] for ratings in driver_ratings.values() for rating in ratings]))
-    plt.figure(figsize=(10, 5))
-    colors = plt.get_cmap(PLOT_COLORMAP, len(team_ratings) + len(driver_ratings))
-    i = 0
-    for team_name, ratings in team_ratings.items():
-        values = [next((rating[0] for rating in ratings if rating[1] == date), None) for date in common_dates]
-        plt.plot(common_dates, values, marker='o', label=team_name, color=colors(i))
-        i += 1
-    for driver_name, ratings in driver_ratings.items():
-        values = [next((rating[0] for rating in ratings if rating[1] == date), None) for date in common_dates]
-        plt.plot(common_dates, values, marker='o', label=driver_name, color=colors(i))
-        i += 1
-    plt.title(f"Rating Progression: Teams vs Drivers")
-    plt.xlabel("Date")
-    plt.ylabel("Rating")
-    plt.xticks(rotation=45)
-    plt.grid()
-    plt.legend(loc='upper left', bbox_to_anchor=(1.02, 1), borderaxespad=0)
-    plt.tight_layout(rect=(0, 0, 0.95, 1))
-    return plt
+    team_dates = np.unique(np.concatenate([dates for _, dates in team_ratings.values()]))
+    driver_dates = np.unique(np.concatenate([dates for _, dates in driver_ratings.values()]))
+    common_dates = np.intersect1d(team_dates, driver_dates)
+    figure, ax = _axes(figure, "Rating Progression: Teams vs Drivers")
+    series = [(common_dates, values_at(ratings, dates, common_dates))
+              for ratings, dates in list(team_ratings.values()) + list(driver_ratings.values())]
+    _draw_series(figure, ax, list(team_ratings) + list(driver_ratings), _thin(ax, series, downsample), bulk)
+    return figure
@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+
+# Runs a function over many tasks across a process pool, for sweeps, calibration and plot export.
+# The state every task reads is set here before the pool starts, so forked workers inherit it instead of
+# every task pickling it again; where fork is unavailable each worker receives it once at startup.
+_state = None # e.g. the parsed dataset
+_shared = None # extra state every worker sees, e.g. a multiprocessing.Value
+
+def _init_worker(state, shared):
+    global _state, _shared
+    _state = state
+    _shared = shared
+
+def pool_context():
+    return multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+
+def map_tasks(function, tasks, state, processes=None, shared=None):
+    # function(task) for every task, with state and shared readable through worker_state(), None uses every CPU
+    global _state, _shared
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    _state, _shared = state, shared
+    try:
+        if processes <= 1:
+            return [function(task) for task in tasks]
+        context = pool_context()
+        if context.get_start_method() == "fork":
+            initializer, initargs = None, ()
+        else:
+            initializer, initargs = _init_worker, (state, shared)
+        with context.Pool(processes, initializer, initargs) as pool:
+            return pool.map(function, tasks, chunksize=1)
+    finally:
+        _state, _shared = None, None
+
+def worker_state():
+    return _state, _shared
@@ -14,20 +14,18 @@ def print_team_rating(team):
         date_str = rating[1].strftime('%Y-%m-%d') if rating[1] else 'N/A'
         print(f"Rating: {round(rating[0])}, Date: {date_str}")
 
-def print_today_grid(teams, drivers, races):
+def print_today_grid(teams, drivers, last_race_teams, last_race_drivers):
     print("Today's grid:")
-    last_race_drivers = get_last_race_drivers(drivers, races)
     num_current_drivers = len(last_race_drivers)
-    drivers.sort(key=lambda x: x.ratings[-1][0])
+    drivers.sort(key=lambda x: x.ratings.current)
     for driver in drivers:
         if driver in last_race_drivers:
             print(f"{num_current_drivers:>2}. {driver}")
             num_current_drivers -= 1
 
     print("Today's teams:")
-    last_race_teams = get_last_race_teams(teams, races)
     num_current_teams = len(last_race_teams)
-    teams.sort(key=lambda x: x.ratings[-1][0])
+    teams.sort(key=lambda x: x.ratings.current)
     for team in teams:
         if team in last_race_teams:
             print(f"{num_current_teams:>2}. {team}")
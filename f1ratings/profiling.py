@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+from .config import *
+
+# Progress output and per-stage timings.
+# report(level, message) prints progress when the verbosity is at least level:
+#   0 nothing, 1 steps and seasons, 2 also every table and race.
+# Inside profile_run every stage() block and timed() function adds its wall time and call count to the run,
+# which ends with a JSON report like
+#   {"run": "gen", "started": "...", "wall_seconds": 4.2,
+#    "stages": {"fetch.races": {"calls": 1, "seconds": 0.01}, "compute.season.1950": {...}, ...},
+#    "memory": {...}, "profile": {...}}
+# where memory (tracemalloc) and profile (cProfile) are only there when asked for.
+# Outside a run, stages and timed functions cost one flag check.
+
+verbosity = VERBOSITY
+_stages = None # stage name -> [calls, seconds] while a run is being profiled
+
+def set_verbosity(level):
+    global verbosity
+    verbosity = level
+
+def report(level, message):
+    if verbosity >= level:
+        print(message)
+
+def record(name, seconds, calls=1):
+    if _stages is not None:
+        totals = _stages.setdefault(name, [0, 0.0])
+        totals[0] += calls
+        totals[1] += seconds
+
+@contextmanager
+def stage(name):
+    if _stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name):
+    # decorator for hot helpers, records every call under name
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _stages is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def _profile_summary(profiler, count):
+    import pstats
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:count]
+    return [{"function": f"{os.path.basename(filename)}:{line}({name})", "calls": calls,
+             "own_seconds": own, "cumulative_seconds": cumulative}
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows]
+
+def _memory_summary(tracemalloc, count):
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics("lineno")[:count]
+    return {"current_bytes": current, "peak_bytes": peak,
+            "top": [{"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes": stat.size}
+                    for stat in top]}
+
+@contextmanager
+def profile_run(name, report_path=PROFILE_REPORT, cprofile=PROFILE_CPROFILE, trace_memory=PROFILE_TRACEMALLOC, **info):
+    # yields the report, filled in and written to report_path (if any) when the run ends
+    # info is extra metadata for the report, e.g. argv=sys.argv[1:]
+    global _stages
+    result = {"run": name, "started": datetime.now().isoformat(timespec="seconds"), **info}
+    _stages = {}
+    profiler = None
+    if cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        result["wall_seconds"] = time.perf_counter() - start
+        result["stages"] = {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in _stages.items()}
+        _stages = None
+        if trace_memory:
+            result["memory"] = _memory_summary(tracemalloc, PROFILE_TOP)
+            tracemalloc.stop()
+        if report_path is not None and os.path.dirname(report_path):
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        if profiler is not None:
+            result["profile"] = {"top": _profile_summary(profiler, PROFILE_TOP)}
+            if report_path is not None:
+                stats_path = f"{os.path.splitext(report_path)[0]}.prof"
+                profiler.dump_stats(stats_path)
+                result["profile"]["stats_file"] = stats_path
+        if report_path is not None:
+            with open(report_path, 'w') as f:
+                json.dump(result, f, indent=2)
+        print_summary(result)
+
+def print_summary(result):
+    report(1, f"{result['run']} took {result['wall_seconds']:.2f}s")
+    stages = sorted(result["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+    for name, totals in stages[:PROFILE_TOP]:
+        report(1, f"\t{name:<40} {totals['seconds']:>8.3f}s {totals['calls']:>8} calls")
+    if "memory" in result:
+        report(1, f"\tPeak traced memory {result['memory']['peak_bytes'] / 2**20:.1f} MiB")
@@ -0,0 +1,116 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import asdict
+from datetime import date
+
+from .dataclasses import *
+from .history import MappedRatingHistory
+
+# Ratings snapshot, the saved form of computed ratings:
+#   magic (4 bytes) | format version (uint32) | header length (uint64) | JSON header | padding | history data
+# The header indexes every driver and team with the offset and length of its history in the data section,
+# where each history is its float64 ratings followed by its int32 day ordinals, 8-byte aligned.
+# Opened with mmap, so a lookup only reads the pages of the histories it touches and processes share the page cache.
+
+SNAPSHOT_MAGIC = b"F1RS"
+SNAPSHOT_VERSION = 2 # 2 added the trough, race count and race sum of each history
+READABLE_VERSIONS = (1, 2)
+PREFIX = struct.Struct("<4sIQ")
+
+def _align(n):
+    return (n + 7) & ~7
+
+def _ordinal(day):
+    return day.toordinal() if day is not None else None
+
+def _day(ordinal):
+    return date.fromordinal(ordinal) if ordinal is not None else None
+
+def is_snapshot(path):
+    with open(path, 'rb') as f:
+        return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+def save_snapshot(path, drivers, teams, checkpoint=None, grid=None):
+    # grid is (driver ids, team ids) of the last race
+    entries = {"drivers": [], "teams": []}
+    chunks = []
+    offset = 0
+    for kind, entities in (("drivers", drivers), ("teams", teams)):
+        for entity in entities:
+            ratings = entity.ratings
+            values = array('d', ratings.values)
+            days = array('i', ratings.days)
+            if sys.byteorder != "little":
+                values.byteswap()
+                days.byteswap()
+            entry = {"id": entity.id, "offset": offset, "length": len(values), "peak_index": ratings.peak_index,
+                     "trough_index": ratings.trough_index, "race_count": ratings.race_count, "race_sum": ratings.race_sum,
+                     "first_race_date": _ordinal(entity.first_race_date), "last_race_date": _ordinal(entity.last_race_date)}
+            if kind == "drivers":
+                entry.update(forename=entity.forename, surname=entity.surname)
+            else:
+                entry.update(name=entity.name)
+            entries[kind].append(entry)
+            data = values.tobytes() + days.tobytes()
+            chunks.append(data + b"\0" * (_align(len(data)) - len(data)))
+            offset += _align(len(data))
+
+    header = json.dumps({
+        **entries,
+        "checkpoint": asdict(checkpoint) if checkpoint is not None else None,
+        "grid": {"drivers": list(grid[0]), "teams": list(grid[1])} if grid is not None else None
+    }).encode()
+    prefix = PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header))
+    padding = b"\0" * (_align(len(prefix) + len(header)) - len(prefix) - len(header))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(prefix + header + padding)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temp_path, path) # readers with the old snapshot mapped keep seeing it
+
+def load_snapshot(path):
+    # (drivers, teams, checkpoint, grid) with histories read lazily from the mapped file
+    with open(path, 'rb') as f:
+        magic, version, header_length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"'{path}' is not a ratings snapshot.")
+        if version not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported ratings snapshot version {version} (expected {SNAPSHOT_VERSION}).")
+        header = json.loads(f.read(header_length))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    data_start = _align(PREFIX.size + header_length)
+
+    def history(entry):
+        aggregates = None
+        if "trough_index" in entry:
+            aggregates = (entry["peak_index"], entry["trough_index"], entry["race_count"], entry["race_sum"])
+        ratings = MappedRatingHistory(buffer, data_start + entry["offset"], entry["length"], aggregates)
+        if sys.byteorder != "little": # copied and swapped to native order
+            values, days = array('d', ratings.values), array('i', ratings.days)
+            values.byteswap()
+            days.byteswap()
+            ratings.values, ratings.days = values, days
+            ratings.recompute_aggregates()
+        return ratings
+
+    drivers = [Driver(id=entry["id"], forename=entry["forename"], surname=entry["surname"], ratings=history(entry),
+                      first_race_date=_day(entry["first_race_date"]), last_race_date=_day(entry["last_race_date"]))
+               for entry in header["drivers"]]
+    teams = [Team(id=entry["id"], name=entry["name"], ratings=history(entry),
+                  first_race_date=_day(entry["first_race_date"]), last_race_date=_day(entry["last_race_date"]))
+             for entry in header["teams"]]
+
+    checkpoint = header["checkpoint"]
+    if checkpoint is not None:
+        checkpoint["season_weights"] = {int(year): weight for year, weight in checkpoint["season_weights"].items()}
+        checkpoint = Checkpoint(**checkpoint)
+    grid = header["grid"]
+    if grid is not None:
+        grid = (grid["drivers"], grid["teams"])
+    return drivers, teams, checkpoint, grid
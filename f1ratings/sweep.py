@@ -0,0 +1,60 @@
+import itertools
+import os
+from contextlib import redirect_stdout
+from dataclasses import replace
+
+import numpy as np
+
+from .config import *
+from .dataclasses import *
+from .compute import *
+from .pool import *
+from .profiling import report
+
+# Runs compute_ratings once per parameter set across a process pool (see pool.py), the parsed dataset is
+# inherited by forked workers and the race features are shared by every parameter set.
+
+def parameter_grid(base=DEFAULT_PARAMETERS, **values):
+    # every combination of the given values, e.g. parameter_grid(swing_multiplier=[1, 2], race_bonus=[0.5, 1])
+    names = list(values)
+    return [replace(base, **dict(zip(names, combination))) for combination in itertools.product(*values.values())]
+
+def as_dataset(dataset):
+    # a fetched F1Ratings or a (seasons, drivers, teams, qualis, sprints, statuses) tuple
+    if hasattr(dataset, "seasons"):
+        return (dataset.seasons, dataset.drivers, dataset.teams, dataset.qualis, dataset.sprints, dataset.statuses)
+    return dataset
+
+def fresh_entities(drivers, teams):
+    return ([replace(driver, ratings=RatingHistory()) for driver in drivers],
+            [replace(team, ratings=RatingHistory()) for team in teams])
+
+def _peak(ratings):
+    return ratings.peak_value if ratings else np.nan
+
+def _current(ratings):
+    return ratings.current if ratings else np.nan
+
+def _compute_table(params):
+    (seasons, drivers, teams, qualis, sprints, statuses), features = worker_state()
+    drivers, teams = fresh_entities(drivers, teams)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        drivers, teams = compute_ratings(seasons, drivers, teams, qualis, sprints, statuses, params=params,
+                                         features=features)
+    return RatingTable(
+        params=params,
+        driver_ids=np.array([driver.id for driver in drivers], dtype=np.int64),
+        driver_ratings=np.array([_current(driver.ratings) for driver in drivers], dtype=np.float64),
+        driver_peaks=np.array([_peak(driver.ratings) for driver in drivers], dtype=np.float64),
+        team_ids=np.array([team.id for team in teams], dtype=np.int64),
+        team_ratings=np.array([_current(team.ratings) for team in teams], dtype=np.float64),
+        team_peaks=np.array([_peak(team.ratings) for team in teams], dtype=np.float64)
+    )
+
+def run_sweep(dataset, param_sets, processes=SWEEP_PROCESSES):
+    # one RatingTable per parameter set, in order
+    tasks = list(param_sets)
+    report(1, f"Computing {len(tasks)} parameter sets...")
+    dataset = as_dataset(dataset)
+    features = dataset_features(dataset) # the same for every parameter set
+    return map_tasks(_compute_table, tasks, dataset, processes, features)
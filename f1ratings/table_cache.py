@@ -0,0 +1,245 @@
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+# Parsed dataset tables cached on disk, keyed by the content hash of their CSV, one file per table:
+#   magic (4 bytes) | format version (uint32) | header length (uint64) | JSON header | padding | column data
+# The header lists every column with its kind and where its data is, every block 8-byte aligned:
+#   int    int64 values, plus one null byte per row when some fields are empty
+#   float  float64 values, same nulls
+#   str    rows + 1 int64 offsets into a block of UTF-8 text, the strings end to end
+# A column is int or float only when every field is written the way str()/repr() writes its number, so the
+# original text of any field can be given back. Files are mapped, so only the columns that are read are paged in.
+# Nothing but the standard library is used, so the csv loader can read the cache without pandas or numpy.
+
+TABLE_CACHE_MAGIC = b"F1TC"
+TABLE_CACHE_VERSION = 1
+PREFIX = struct.Struct("<4sIQ")
+CHUNK_ROWS = 65536
+INT64_MIN, INT64_MAX = -2**63, 2**63 - 1
+
+def _align(n):
+    return (n + 7) & ~7
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+def cache_path(path, cache_dir):
+    name = os.path.basename(path).split('.')[0]
+    return os.path.join(cache_dir, f"{name}-{file_digest(path)[:16]}.table")
+
+def _int(value):
+    # value as an int when str() writes that int the same way, else None
+    if value.isascii() and (value.isdigit() or (value[:1] == '-' and value[1:].isdigit())):
+        number = int(value)
+        if str(number) == value and INT64_MIN <= number <= INT64_MAX:
+            return number
+    return None
+
+def _float(value):
+    # value as a float when repr() writes that float the same way, else None
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if repr(number) == value else None
+
+class ColumnBuilder:
+    # collects a column chunk by chunk, as numbers while every field is one, as strings from the first that is not
+    def __init__(self):
+        self.kind = None # decided by the first field that is not empty
+        self.rows = 0
+        self.values = None
+        self.nulls = bytearray()
+        self.offsets = array('q', [0])
+        self.text = bytearray()
+
+    def raw(self):
+        # the fields added so far, as they were written
+        if self.kind is None:
+            return [''] * self.rows
+        write = str if self.kind == "int" else repr
+        return ['' if null else write(value) for value, null in zip(self.values, self.nulls)]
+
+    def _numbers(self, values):
+        # values as numbers of this column's kind (deciding it if needed), None when one of them is not
+        for kind, parse, typecode in (("int", _int, 'q'), ("float", _float, 'd')):
+            if self.kind not in (None, kind):
+                continue
+            numbers = []
+            for value in values:
+                number = parse(value) if value != '' else None
+                if number is None and value != '':
+                    break
+                numbers.append(number)
+            else:
+                if self.kind is None and all(number is None for number in numbers):
+                    return None # no kind to decide yet
+                if self.kind is None:
+                    empty = 0 if kind == "int" else float('nan')
+                    self.kind, self.values = kind, array(typecode, [empty] * self.rows)
+                    self.nulls = bytearray([1]) * self.rows
+                return numbers
+        return None
+
+    def extend(self, values):
+        if self.kind != "str":
+            numbers = self._numbers(values)
+            if numbers is not None:
+                empty = 0 if self.kind == "int" else float('nan')
+                self.values.extend([empty if number is None else number for number in numbers])
+                self.nulls.extend([number is None for number in numbers])
+                self.rows += len(values)
+                return
+            if self.kind is None and all(value == '' for value in values):
+                self.rows += len(values)
+                return
+            raw = self.raw()
+            self.kind, self.values, self.nulls = "str", None, bytearray()
+            self._extend_text(raw)
+        self._extend_text(values)
+        self.rows += len(values)
+
+    def _extend_text(self, values):
+        encoded = [value.encode() for value in values]
+        start = self.offsets[-1]
+        self.offsets.extend(start + end for end in accumulate(map(len, encoded)))
+        self.text += b"".join(encoded)
+
+    def blocks(self):
+        # (header entry, data blocks) of the finished column, a column of empty fields is a float column of nulls
+        if self.kind is None:
+            self.kind = "float" if self.rows else "str"
+            if self.rows:
+                self.values, self.nulls = array('d', [float('nan')]) * self.rows, bytearray([1]) * self.rows
+        if self.kind == "str":
+            offsets = array('q', self.offsets)
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            return {"kind": "str", "ascii": self.text.isascii()}, [offsets.tobytes(), bytes(self.text)]
+        values = array(self.values.typecode, self.values)
+        if sys.byteorder != "little":
+            values.byteswap()
+        if not any(self.nulls):
+            return {"kind": self.kind}, [values.tobytes()]
+        return {"kind": self.kind}, [values.tobytes(), bytes(self.nulls)]
+
+def write_table_cache(path, target):
+    # parses the CSV at path into a cache file at target, written under a temporary name and renamed into place
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        builders = [ColumnBuilder() for _ in header]
+        chunk = []
+        for row in reader:
+            if row:
+                chunk.append(row if len(row) == len(header) else (row + [''] * len(header))[:len(header)])
+            if len(chunk) == CHUNK_ROWS:
+                for builder, values in zip(builders, zip(*chunk)):
+                    builder.extend(values)
+                chunk = []
+        if chunk:
+            for builder, values in zip(builders, zip(*chunk)):
+                builder.extend(values)
+
+    columns = []
+    blocks = []
+    offset = 0
+    for name, builder in zip(header, builders):
+        column, data = builder.blocks()
+        column.update(name=name, blocks=[])
+        for block in data:
+            column["blocks"].append([offset, len(block)])
+            blocks.append(block + b"\0" * (_align(len(block)) - len(block)))
+            offset += _align(len(block))
+        columns.append(column)
+    rows = builders[0].rows if builders else 0
+    header = json.dumps({"rows": rows, "columns": columns}).encode()
+    prefix = PREFIX.pack(TABLE_CACHE_MAGIC, TABLE_CACHE_VERSION, len(header))
+    padding = b"\0" * (_align(len(prefix) + len(header)) - len(prefix) - len(header))
+
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    temp_path = f"{target}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as f:
+        f.write(prefix + header + padding)
+        for block in blocks:
+            f.write(block)
+    os.replace(temp_path, target)
+
+class CachedTable:
+    # a cache file mapped read-only, columns are read by name, source is the CSV it was parsed from
+    def __init__(self, path, source=None):
+        self.source = source
+        with open(path, 'rb') as f:
+            magic, version, header_length = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != TABLE_CACHE_MAGIC:
+                raise ValueError(f"'{path}' is not a table cache.")
+            if version != TABLE_CACHE_VERSION:
+                raise ValueError(f"Unsupported table cache version {version} (expected {TABLE_CACHE_VERSION}).")
+            header = json.loads(f.read(header_length))
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data_start = _align(PREFIX.size + header_length)
+        self.rows = header["rows"]
+        self.columns = {column["name"]: column for column in header["columns"]}
+
+    def block(self, name, i):
+        start, length = self.columns[name]["blocks"][i]
+        start += self.data_start
+        return memoryview(self.buffer)[start:start + length]
+
+    def kind(self, name):
+        return self.columns[name]["kind"]
+
+    def has_nulls(self, name):
+        return len(self.columns[name]["blocks"]) > 1 and self.kind(name) != "str"
+
+    def _array(self, name, i, typecode):
+        values = self.block(name, i).cast(typecode)
+        if sys.byteorder != "little": # copied and swapped to native order
+            values = array(typecode, values)
+            values.byteswap()
+        return values
+
+    def numbers(self, name):
+        # int or float column as a list, empty fields are 0 or NaN
+        return self._array(name, 0, 'q' if self.kind(name) == "int" else 'd').tolist()
+
+    def nulls(self, name):
+        # True for the empty fields of an int or float column
+        if not self.has_nulls(name):
+            return [False] * self.rows
+        return [bool(null) for null in self.block(name, 1)]
+
+    def strings(self, name):
+        offsets = self._array(name, 0, 'q').tolist()
+        text = self.block(name, 1)
+        if self.columns[name]["ascii"]: # byte offsets are character offsets
+            text = str(text, 'ascii')
+            return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        text = bytes(text)
+        return [text[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+
+    def raw(self, name):
+        # every field of the column as it was written in the CSV
+        if self.kind(name) == "str":
+            return self.strings(name)
+        write = str if self.kind(name) == "int" else repr
+        return ['' if null else write(value) for value, null in zip(self.numbers(name), self.nulls(name))]
+
+def open_table_cache(path, cache_dir):
+    # the CachedTable of the CSV at path, parsed and cached first when it is not cached yet
+    target = cache_path(path, cache_dir)
+    if os.path.exists(target):
+        try:
+            return CachedTable(target, path)
+        except (ValueError, OSError, struct.error):
+            pass # written by another version or damaged, parsed again
+    write_table_cache(path, target)
+    return CachedTable(target, path)
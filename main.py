@@ -1,13 +1,28 @@
 import f1ratings as f1
 from datetime import datetime
 import sys
-from f1ratings.helpers import get_driver_by_name, get_team_by_name
 from f1ratings.dataclasses import Driver, Team
+from f1ratings.config import DATASET_DIR, FETCH_LOADER, VERBOSITY, PROFILE_REPORT, PROFILE_CPROFILE, PROFILE_TRACEMALLOC
+from f1ratings.profiling import set_verbosity, profile_run
 
-def gen_ratings():
+def get_option(args, name, default=None):
+    for arg in args:
+        if arg.startswith(f"--{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+def gen_ratings(args):
+    previous = None
+    if "--incremental" in args:
+        previous = f1.F1Ratings()
+        try:
+            previous.load()
+        except FileNotFoundError:
+            print("No saved ratings to continue from.")
+            previous = None
     f1ratings = f1.F1Ratings()
-    f1ratings.fetch()
-    f1ratings.compute()
+    f1ratings.fetch(get_option(args, "data", DATASET_DIR), loader=get_option(args, "loader", FETCH_LOADER))
+    f1ratings.compute(previous=previous)
     print("Ratings computed successfully!")
     f1ratings.save()
     print("Ratings saved successfully!")
@@ -19,103 +34,123 @@ def load_ratings():
     print("Ratings loaded successfully!")
     return f1ratings
 
+def find_entity(f1ratings, name):
+    # partial and misspelled names are accepted, so the name they resolved to is reported
+    entity, stage = f1ratings.match(name)
+    if isinstance(entity, Driver) and stage != "exact":
+        print(f"'{name}' matched driver {entity.forename} {entity.surname}.")
+    elif isinstance(entity, Team) and stage != "exact":
+        print(f"'{name}' matched team {entity.name}.")
+    return entity
+
 def plot_ratings(f1ratings, args):
     if args[1] == "plot" and len(args) == 2:
             f1ratings.show_plot_today_grid()
     elif args[1] == "plot" and len(args) == 3:
-        driver = f1ratings.get_driver_by_name(args[2])
-        team = f1ratings.get_team_by_name(args[2])
-        if driver is not None:
-            f1ratings.show_plot_driver_rating(f"{driver.forename} {driver.surname}")
-        elif team is not None:
-            f1ratings.show_plot_teams_rating(team.name)
+        entity = find_entity(f1ratings, args[2])
+        if isinstance(entity, Driver):
+            f1ratings.show_plot_driver_rating(entity)
+        elif isinstance(entity, Team):
+            f1ratings.show_plot_team_rating(entity)
         else:
             print(f"Driver or team '{args[2]}' not found.")
     elif args[1] == "plot" and len(args) > 3:
-        names = args[2:]
-        drivers = [f1ratings.get_driver_by_name(name) for name in names]
-        teams = [f1ratings.get_team_by_name(name) for name in names]
-        if any(driver is not None for driver in drivers) and any(team is not None for team in teams):
-            f1ratings.show_plot_teams_and_drivers(
-                [team.name for team in teams if team is not None],
-                [f"{driver.forename} {driver.surname}" for driver in drivers if driver is not None]
-            )
-        elif any(driver is not None for driver in drivers):
-            f1ratings.show_plot_drivers_rating(
-                [f"{driver.forename} {driver.surname}" for driver in drivers if driver is not None]
-            )
-        elif any(team is not None for team in teams):
-            f1ratings.show_plot_teams_rating(
-                [team.name for team in teams if team is not None]
-            )
+        entities = [find_entity(f1ratings, name) for name in args[2:]]
+        drivers = [entity for entity in entities if isinstance(entity, Driver)]
+        teams = [entity for entity in entities if isinstance(entity, Team)]
+        if drivers and teams:
+            f1ratings.show_plot_teams_and_drivers(teams, drivers)
+        elif drivers:
+            f1ratings.show_plot_drivers_rating(drivers)
+        elif teams:
+            f1ratings.show_plot_teams_rating(teams)
         else:
             print("Some drivers or teams not found.")
 
+def print_entity_rating(f1ratings, name):
+    entity = find_entity(f1ratings, name)
+    if isinstance(entity, Driver):
+        f1ratings.print_driver_rating(entity)
+    elif isinstance(entity, Team):
+        f1ratings.print_team_rating(entity)
+    else:
+        print(f"Driver or team '{name}' not found.")
+
 def print_ratings(f1ratings, args):
     if args[1] == "print":
         if len(args) == 2:
             f1ratings.print_today_grid()
-        elif len(args) == 3:
-            driver = f1ratings.get_driver_by_name(args[2])
-            team = f1ratings.get_team_by_name(args[2])
-            if driver is not None:
-                f1ratings.print_driver_rating(f"{driver.forename} {driver.surname}")
-            elif team is not None:
-                f1ratings.print_team_rating(team.name)
-            else:
-                print(f"Driver or team '{args[2]}' not found.")
-        elif len(args) > 3:
-            names = args[2:]
-            drivers = [f1ratings.get_driver_by_name(name) for name in names]
-            teams = [f1ratings.get_team_by_name(name) for name in names]
-            for driver in drivers:
-                if driver is not None:
-                    f1ratings.print_driver_rating(f"{driver.forename} {driver.surname}")
-                else:
-                    print(f"Driver not found.")
-            for team in teams:
-                if team is not None:
-                    f1ratings.print_team_rating(team.name)
-                else:
-                    print(f"Team not found.")
+        else:
+            for name in args[2:]:
+                print_entity_rating(f1ratings, name)
 
 def change_ratings(f1ratings, args):
     if args[1] == "change":
         if len(args) == 3:
-            driver = f1ratings.get_driver_by_name(args[2])
-            team = f1ratings.get_team_by_name(args[2])
-            if driver is not None:
-                f1ratings.print_driver_last_change(args[2])
-            elif team is not None:
-                f1ratings.print_team_last_change(team.name)
+            entity = find_entity(f1ratings, args[2])
+            if isinstance(entity, Driver):
+                f1ratings.print_driver_last_change(entity)
+            elif isinstance(entity, Team):
+                f1ratings.print_team_last_change(entity)
             else:
                 print(f"Driver or team '{args[2]}' not found.")
         else:
             print("Usage: change [name]")
             print("  name: Name of the driver or team to check last change")
 
+def export_ratings(f1ratings, args, options):
+    if args[1] == "export":
+        directory = args[2] if len(args) > 2 else "ratings/export"
+        jobs = f1ratings.grid_plot_jobs(directory, get_option(options, "format", "png"))
+        paths = f1ratings.export_plots(jobs)
+        print(f"Exported {len(paths)} plots to {directory}")
+
+def run_command(argv):
+    # options (--name or --name=value) are only read by gen and export, the other commands take names
+    args = [arg for arg in argv if not arg.startswith("--")]
+    if args[1] == "gen":
+        f1ratings = gen_ratings(argv[1:])
+    else:
+        f1ratings = load_ratings()
+
+    if args[1] == "dump":
+        f1ratings.dump_ratings()
+        print("Ratings dumped successfully!")
+
+    plot_ratings(f1ratings, args)
+    print_ratings(f1ratings, args)
+    change_ratings(f1ratings, args)
+    export_ratings(f1ratings, args, argv)
+
 if __name__ == "__main__": 
-    if len(sys.argv) > 1:
-        if sys.argv[1] not in ["gen", "load", "dump", "plot", "print", "change"] or sys.argv[1] == "help" or (sys.argv[1] == "plot" and len(sys.argv) < 3) or (sys.argv[1] == "print" and len(sys.argv) < 2):
+    args = [arg for arg in sys.argv if not arg.startswith("--")]
+    if len(args) > 1:
+        if args[1] not in ["gen", "load", "dump", "plot", "print", "change", "export"] or args[1] == "help" or (args[1] == "plot" and len(args) < 3) or (args[1] == "print" and len(args) < 2):
             print("Usage: python main.py [gen|load|dump|plot [driver_name|team_name]]")
             print("  gen: Generate ratings from scratch")
+            print("  gen --data=[dir]: Generate ratings from a local directory of dataset CSVs (offline)")
+            print("  gen --data=[dir] --loader=[csv|pandas]: Read the CSVs with the csv module (no pandas needed) or with pandas")
+            print("  gen --incremental: Compute only races newer than the saved ratings")
             print("  dump: Dump ratings to file")
             print("  plot [name]: Plot ratings for a driver or team")
             print("  plot [name1 name2 ...]: Plot ratings for multiple drivers or teams")
             print("  print [name]: Print ratings for a driver or team")
             print("  print [name1 name2 ...]: Print ratings for multiple drivers or teams")
             print("  change [name]: Last change in ratings for a driver or team")
+            print("  export [dir] [--format=png|svg]: Save plots of every driver and team on the grid")
+            print("Options for every command:")
+            print("  --verbosity=[0|1|2]: Progress output, 0 silent, 1 steps and seasons, 2 also every table and race")
+            print("  --report=[path]: Time every stage and write the timings to a JSON report")
+            print("  --profile: Also profile the run with cProfile (saved next to the report)")
+            print("  --trace-memory: Also trace memory with tracemalloc")
             sys.exit(1)
 
-        if sys.argv[1] == "gen":
-            f1ratings = gen_ratings()
+        set_verbosity(int(get_option(sys.argv, "verbosity", VERBOSITY)))
+        report_path = get_option(sys.argv, "report", PROFILE_REPORT)
+        cprofile = "--profile" in sys.argv or PROFILE_CPROFILE
+        trace_memory = "--trace-memory" in sys.argv or PROFILE_TRACEMALLOC
+        if report_path is not None or cprofile or trace_memory:
+            with profile_run(args[1], report_path, cprofile, trace_memory, argv=sys.argv[1:]):
+                run_command(sys.argv)
         else:
-            f1ratings = load_ratings()
-
-        if sys.argv[1] == "dump":
-            f1ratings.dump_ratings()
-            print("Ratings dumped successfully!")
-
-        plot_ratings(f1ratings, sys.argv)
-        print_ratings(f1ratings, sys.argv)
-        change_ratings(f1ratings, sys.argv)
+            run_command(sys.argv)
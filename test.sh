@@ -1,5 +1,6 @@
 #!/bin/bash
 source venv/bin/activate
+python -m unittest discover tests
 python main.py gen
 python main.py dump
 python main.py print
@@ -0,0 +1,99 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from dataclasses import replace
+from datetime import datetime
+
+from f1ratings.api import F1Ratings
+from f1ratings.checkpoint import check_checkpoint
+from f1ratings.config import DEFAULT_PARAMETERS
+from f1ratings.index import build_participation
+from test_compute import RESET_PARAMETERS, fixture_dataset, histories
+
+# gen --incremental: computing on from a saved checkpoint gives the ratings of a full rebuild, and a checkpoint
+# from other parameters or other historical results is not used.
+
+FIRST_YEAR = datetime.now().year - 2 # the last fixture season is the current one, so it can be cut mid-season
+
+def truncated(dataset, races):
+    # the dataset without its last races and their sessions
+    seasons, drivers, teams, qualis, sprints, statuses = dataset
+    kept = [race for season in seasons for race in season.races][:-races]
+    kept_ids = {race.id for race in kept}
+    seasons = [replace(season, races=[race for race in season.races if race.id in kept_ids]) for season in seasons]
+    seasons = [season for season in seasons if season.races]
+    return (seasons, drivers, teams, [quali for quali in qualis if quali.race_id in kept_ids],
+            [sprint for sprint in sprints if sprint.race_id in kept_ids], statuses)
+
+def checkpoint_reason(checkpoint, dataset, params=DEFAULT_PARAMETERS):
+    seasons, _, teams, qualis, sprints, _ = dataset
+    return check_checkpoint(checkpoint, seasons, teams, qualis, sprints, params)
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name) # F1Ratings saves to ratings/ in the working directory
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def ratings(self, dataset, params=DEFAULT_PARAMETERS, previous=None):
+        f1ratings = F1Ratings()
+        (f1ratings.seasons, f1ratings.drivers, f1ratings.teams, f1ratings.qualis, f1ratings.sprints,
+         f1ratings.statuses) = dataset
+        f1ratings.participation = build_participation(f1ratings.seasons)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            f1ratings.compute(previous=previous, params=params)
+        self.output = output.getvalue()
+        return f1ratings
+
+    def previous(self, dataset, params=DEFAULT_PARAMETERS):
+        # an earlier gen, saved and loaded back the way main.py does it
+        self.ratings(dataset, params).save("previous")
+        previous = F1Ratings()
+        previous.load("previous")
+        return previous
+
+    def assertSameRatings(self, f1ratings, expected):
+        self.assertEqual(histories(f1ratings.drivers), histories(expected.drivers))
+        self.assertEqual(histories(f1ratings.teams), histories(expected.teams))
+
+    def test_incremental_matches_full_rebuild(self):
+        for rules, params in (("default", DEFAULT_PARAMETERS), ("season start", replace(DEFAULT_PARAMETERS, **RESET_PARAMETERS))):
+            full = self.ratings(fixture_dataset(first_year=FIRST_YEAR), params)
+            for races in (1, 2, 3): # mid-season, and from the end of the season before
+                with self.subTest(rules=rules, races=races):
+                    previous = self.previous(truncated(fixture_dataset(first_year=FIRST_YEAR), races), params)
+                    incremental = self.ratings(fixture_dataset(first_year=FIRST_YEAR), params, previous)
+                    self.assertIn("incrementally", self.output)
+                    self.assertSameRatings(incremental, full)
+
+    def test_changed_parameters_force_full_recompute(self):
+        params = replace(DEFAULT_PARAMETERS, race_bonus=DEFAULT_PARAMETERS.race_bonus * 2)
+        previous = self.previous(truncated(fixture_dataset(first_year=FIRST_YEAR), 1))
+        dataset = fixture_dataset(first_year=FIRST_YEAR)
+        self.assertEqual(checkpoint_reason(previous.checkpoint, dataset, params), "parameters changed")
+        recomputed = self.ratings(dataset, params, previous)
+        self.assertIn("parameters changed", self.output)
+        self.assertSameRatings(recomputed, self.ratings(fixture_dataset(first_year=FIRST_YEAR), params))
+
+    def test_changed_history_forces_full_recompute(self):
+        previous = self.previous(truncated(fixture_dataset(first_year=FIRST_YEAR), 1))
+        def changed():
+            dataset = fixture_dataset(first_year=FIRST_YEAR)
+            results = dataset[0][0].races[0].results
+            results[0], results[1] = results[1][:2] + results[0][2:], results[0][:2] + results[1][2:] # swap the top two
+            return dataset
+        dataset = changed()
+        self.assertEqual(checkpoint_reason(previous.checkpoint, dataset), "historical results changed")
+        recomputed = self.ratings(dataset, previous=previous)
+        self.assertIn("historical results changed", self.output)
+        self.assertSameRatings(recomputed, self.ratings(changed()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from f1ratings.helpers import (distribution_function, distribution_table, half_distribution_function,
+                               half_distribution_table, table_value)
+
+# Kernel tables stand in for the scalar kernels on the hot path, so a lookup must give exactly what the kernel does.
+
+class KernelTableTest(unittest.TestCase):
+    def test_tables_match_kernels(self):
+        for a in range(3, 40): # smaller fields divide by zero in the kernels themselves
+            for N in (5, 1):
+                for table, function in ((distribution_table(a, N), distribution_function),
+                                        (half_distribution_table(a, N), half_distribution_function)):
+                    for x in range(-2, a + 4):
+                        self.assertEqual(table_value(table, x, function, a, N), function(x, a, N), (a, N, x))
+
+    def test_other_positions_fall_back_to_kernel(self):
+        table = distribution_table(20, 5)
+        for x in ("3", "\\N", None, 2.5, True, 100):
+            self.assertEqual(table_value(table, x, distribution_function, 20, 5), distribution_function(x, 20, 5))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import os
+import pickle
+import struct
+import tempfile
+import unittest
+from datetime import date
+
+from f1ratings.dataclasses import Checkpoint, Driver, Team
+from f1ratings.history import MappedRatingHistory, RatingHistory
+from f1ratings.snapshot import PREFIX, SNAPSHOT_VERSION, is_snapshot, load_snapshot, save_snapshot
+
+# Ratings snapshot format: what is saved loads back the same, unknown files and versions are rejected and
+# mapped histories copy themselves before they grow, leaving the file untouched.
+
+def sample_drivers():
+    return [Driver(1, "Juan Manuel", "Fangio", [(1200, None), (1250.5, date(1950, 5, 13)), (1190.25, date(1950, 5, 21))],
+                   date(1950, 5, 13), date(1950, 5, 21)),
+            Driver(2, "Sergio", "Pérez", [(1200, None), (1180.0, date(2011, 3, 27)), (1200, None), (1310.75, date(2024, 12, 8))],
+                   date(2011, 3, 27), date(2024, 12, 8)),
+            Driver(3, "Never", "Raced", [(1200, None)])]
+
+def sample_teams():
+    return [Team(10, "Alfa Romeo", [(1200, None), (1400.125, date(1950, 5, 13))], date(1950, 5, 13), date(1950, 5, 13)),
+            Team(11, "Empty", RatingHistory())]
+
+def sample_checkpoint():
+    return Checkpoint(season=2024, season_races=24, season_team_ids=[10], reentry_team_ids=[], team_ids=[10, 11],
+                      season_weights={1950: 3.0, 2024: 1.0}, history_digest="abc", config_digest="def")
+
+def aggregates(ratings):
+    return ratings.peak_index, ratings.trough_index, ratings.race_count, ratings.race_sum
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.path = os.path.join(self.directory.name, "ratings.f1")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        drivers, teams = sample_drivers(), sample_teams()
+        save_snapshot(self.path, drivers, teams, sample_checkpoint(), ([1, 2], [10]))
+        self.assertTrue(is_snapshot(self.path))
+        loaded_drivers, loaded_teams, checkpoint, grid = load_snapshot(self.path)
+
+        self.assertEqual(len(loaded_drivers), len(drivers))
+        for driver, loaded in zip(drivers, loaded_drivers):
+            self.assertIsInstance(loaded.ratings, MappedRatingHistory)
+            self.assertEqual((loaded.id, loaded.forename, loaded.surname), (driver.id, driver.forename, driver.surname))
+            self.assertEqual((loaded.first_race_date, loaded.last_race_date), (driver.first_race_date, driver.last_race_date))
+            self.assertEqual(list(loaded.ratings), list(driver.ratings))
+            self.assertEqual(aggregates(loaded.ratings), aggregates(driver.ratings))
+        self.assertEqual(len(loaded_teams), len(teams))
+        for team, loaded in zip(teams, loaded_teams):
+            self.assertEqual((loaded.id, loaded.name), (team.id, team.name))
+            self.assertEqual(list(loaded.ratings), list(team.ratings))
+            self.assertEqual(aggregates(loaded.ratings), aggregates(team.ratings))
+        self.assertEqual(checkpoint, sample_checkpoint())
+        self.assertEqual(grid, ([1, 2], [10]))
+
+    def test_round_trip_without_checkpoint(self):
+        save_snapshot(self.path, sample_drivers(), sample_teams())
+        _, _, checkpoint, grid = load_snapshot(self.path)
+        self.assertIsNone(checkpoint)
+        self.assertIsNone(grid)
+
+    def test_unknown_version_rejected(self):
+        save_snapshot(self.path, sample_drivers(), sample_teams())
+        with open(self.path, 'r+b') as f:
+            magic, _, header_length = PREFIX.unpack(f.read(PREFIX.size))
+            f.seek(0)
+            f.write(PREFIX.pack(magic, SNAPSHOT_VERSION + 1, header_length))
+        with self.assertRaisesRegex(ValueError, "version"):
+            load_snapshot(self.path)
+
+    def test_version_1_read(self):
+        # version 1 had no stored trough, race count or race sum, they are recomputed from the histories
+        drivers = sample_drivers()
+        save_snapshot(self.path, drivers, sample_teams())
+        with open(self.path, 'r+b') as f:
+            magic, _, header_length = PREFIX.unpack(f.read(PREFIX.size))
+            header = json.loads(f.read(header_length))
+            for entry in header["drivers"] + header["teams"]:
+                for key in ("trough_index", "race_count", "race_sum"):
+                    del entry[key]
+            old_header = json.dumps(header).encode()
+            f.seek(0)
+            f.write(PREFIX.pack(magic, 1, header_length) + old_header.ljust(header_length))
+        loaded_drivers = load_snapshot(self.path)[0]
+        for driver, loaded in zip(drivers, loaded_drivers):
+            self.assertEqual(list(loaded.ratings), list(driver.ratings))
+            self.assertEqual(aggregates(loaded.ratings), aggregates(driver.ratings))
+
+    def test_other_file_rejected(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"PK\3\4" + bytes(PREFIX.size))
+        self.assertFalse(is_snapshot(self.path))
+        with self.assertRaisesRegex(ValueError, "not a ratings snapshot"):
+            load_snapshot(self.path)
+
+    def test_append_after_map(self):
+        save_snapshot(self.path, sample_drivers(), sample_teams())
+        drivers, teams, _, _ = load_snapshot(self.path)
+        ratings = drivers[1].ratings
+        expected = list(ratings) + [(1500.0, date(2025, 3, 16))]
+        ratings.append((1500.0, date(2025, 3, 16)))
+
+        self.assertEqual(len(ratings), len(expected))
+        self.assertEqual(list(ratings), expected)
+        self.assertEqual(ratings.current, 1500.0)
+        self.assertEqual(ratings.peak, (1500.0, date(2025, 3, 16)))
+        self.assertEqual(aggregates(ratings), aggregates(RatingHistory(expected)))
+        # the neighbouring histories and the file keep the saved ratings
+        self.assertEqual(list(drivers[0].ratings), list(sample_drivers()[0].ratings))
+        self.assertEqual(list(load_snapshot(self.path)[0][1].ratings), expected[:-1])
+
+        # appending to an empty mapped history works the same way
+        teams[1].ratings.append((1200, None))
+        self.assertEqual(list(teams[1].ratings), [(1200, None)])
+
+    def test_save_over_mapped_snapshot(self):
+        save_snapshot(self.path, sample_drivers(), sample_teams())
+        drivers, teams, _, _ = load_snapshot(self.path)
+        drivers[0].ratings.append((1300.0, date(1950, 6, 4)))
+        save_snapshot(self.path, drivers, teams)
+        self.assertEqual(list(load_snapshot(self.path)[0][0].ratings), list(drivers[0].ratings))
+
+    def test_pickled_as_plain_history(self):
+        save_snapshot(self.path, sample_drivers(), sample_teams())
+        ratings = load_snapshot(self.path)[0][1].ratings
+        copy = pickle.loads(pickle.dumps(ratings))
+        self.assertIs(type(copy), RatingHistory)
+        self.assertEqual(list(copy), list(ratings))
+        self.assertEqual(aggregates(copy), aggregates(ratings))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from f1ratings import table_cache
+from f1ratings.table_cache import PREFIX, TABLE_CACHE_VERSION, cache_path, open_table_cache
+
+# Table cache format: every field reads back as written in the CSV, numbers are only kept as numbers when that
+# holds, and files from another version are parsed again.
+
+EDGE_CSV = ('id,empty,text,na,flag,ratio,blank,name,quoted,padded\n'
+            '1,,x,NA,True,2.5,,Pérez,"q,1",007\n'
+            '2,,,3,False,1e3,,\\N,"line\nbreak",-0\n'
+            '-3,,\\N,4,true,nan,,Ω,z,5\n')
+
+def csv_columns(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        header, *rows = list(csv.reader(f))
+    return {name: [row[i] for row in rows] for i, name in enumerate(header)}
+
+class TableCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.cache_dir = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return path
+
+    def test_fields_read_back_as_written(self):
+        path = self.write("edge.csv", EDGE_CSV)
+        table = open_table_cache(path, self.cache_dir)
+        for name, fields in csv_columns(path).items():
+            self.assertEqual(table.raw(name), fields, name)
+        self.assertEqual(table.rows, 3)
+        self.assertEqual({name: table.kind(name) for name in table.columns},
+                         {"id": "int", "empty": "float", "text": "str", "na": "str", "flag": "str", "ratio": "str",
+                          "blank": "float", "name": "str", "quoted": "str", "padded": "str"})
+        self.assertEqual(table.numbers("id"), [1, 2, -3])
+        self.assertEqual(table.strings("name"), ["Pérez", "\\N", "Ω"])
+
+    def test_kind_changes_between_chunks(self):
+        table_cache.CHUNK_ROWS, chunk_rows = 2, table_cache.CHUNK_ROWS
+        try:
+            path = self.write("chunks.csv", "late,mixed,broken\n,1,1\n,2,2\n1,3,x\n2,\\N,4\n3,5,5\n")
+            table = open_table_cache(path, self.cache_dir)
+        finally:
+            table_cache.CHUNK_ROWS = chunk_rows
+        for name, fields in csv_columns(path).items():
+            self.assertEqual(table.raw(name), fields, name)
+        self.assertEqual((table.kind("late"), table.kind("mixed"), table.kind("broken")), ("int", "str", "str"))
+        self.assertTrue(table.has_nulls("late"))
+
+    def test_header_only(self):
+        path = self.write("empty.csv", "a,b\n")
+        table = open_table_cache(path, self.cache_dir)
+        self.assertEqual((table.rows, table.raw("a"), table.raw("b")), (0, [], []))
+
+    def test_keyed_by_content(self):
+        path = self.write("table.csv", "a\n1\n")
+        first = cache_path(path, self.cache_dir)
+        open_table_cache(path, self.cache_dir)
+        self.write("table.csv", "a\n2\n")
+        self.assertNotEqual(cache_path(path, self.cache_dir), first)
+        self.assertEqual(open_table_cache(path, self.cache_dir).numbers("a"), [2])
+
+    def test_other_version_parsed_again(self):
+        path = self.write("table.csv", "a,b\n1,x\n")
+        open_table_cache(path, self.cache_dir)
+        target = cache_path(path, self.cache_dir)
+        with open(target, 'r+b') as f:
+            magic, _, header_length = PREFIX.unpack(f.read(PREFIX.size))
+            f.seek(0)
+            f.write(PREFIX.pack(magic, TABLE_CACHE_VERSION + 1, header_length))
+        table = open_table_cache(path, self.cache_dir)
+        self.assertEqual((table.raw("a"), table.raw("b")), (["1"], ["x"]))
+
+    def test_read_as_pandas_reads_the_csv(self):
+        try:
+            import pandas as pd
+            from f1ratings.fetch import load_table
+        except ImportError:
+            self.skipTest("pandas and kagglehub are not installed")
+        path = self.write("edge.csv", EDGE_CSV)
+        pd.testing.assert_frame_equal(load_table(path, self.cache_dir), pd.read_csv(path))
+        pd.testing.assert_frame_equal(load_table(path, self.cache_dir), pd.read_csv(path)) # from the cache
+
+if __name__ == "__main__":
+    unittest.main()